@@ -40,5 +40,7 @@ raising exceptions on error. You can also obtain raw string with `load_json=Fals
 None instead when they happen with `throw_on_error=False`.
 
 """
-from .api import GenericAPI, APIMethod, APIError, PrepareCallArgs, GenericAPICreator, GenericAPIBase
+from .api import GenericAPI, APIMethod, APIError, PrepareCallArgs, GenericAPICreator, GenericAPIBase, SharedSession
+from .api import Bulkhead
 from .async_api import AsyncAPI, AsyncAPIBase
+from .openapi import generate_api
@@ -0,0 +1,197 @@
+"""
+.. module:: adapters
+    :platform: Unix, Windows
+    :synopsis: This module contains the transport adapter used by SharedSession, which instruments connections
+     opened by its pools and resolves their hosts through an in-process DNS cache.
+
+"""
+import socket
+import timeit
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+from .tracing import current_span
+
+
+__all__ = ['PoolingAdapter', 'DNSCache', 'DNS_CACHE']
+
+# Default time (seconds) resolved addresses are kept for.
+DEFAULT_DNS_TTL = 60.0
+
+
+class DNSCache(object):
+    """
+    In-process cache of resolved host addresses, so new connections skip DNS lookups until the entry expires.
+    A host whose every cached address refuses connections is resolved again on the next attempt.
+
+    Connections of SharedSession use the process-wide DNS_CACHE, its ttl can be changed at any time:
+
+    >>> from devourer.adapters import DNS_CACHE
+    >>> DNS_CACHE.ttl = 300
+    """
+    def __init__(self, ttl=DEFAULT_DNS_TTL):
+        """
+        :param ttl: time (seconds) resolved addresses are kept for, 0 disables caching.
+        :returns: None
+        """
+        self.ttl = ttl
+        self._entries = {}
+
+    def resolve(self, host, port):
+        """
+        Return addresses of a host, resolving it if it isn't cached or the entry has expired.
+
+        :param host: host name or address.
+        :param port: port number.
+        :returns: list of addresses, in order returned by the resolver.
+        :raises socket.gaierror: when the host can't be resolved.
+        """
+        now = timeit.default_timer()
+        entry = self._entries.get((host, port))
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        addresses = []
+        for _, _, _, _, address in socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM):
+            if address[0] not in addresses:
+                addresses.append(address[0])
+        if self.ttl > 0:
+            self._entries[(host, port)] = (now + self.ttl, addresses)
+        return addresses
+
+    def invalidate(self, host, port):
+        """
+        Drop cached addresses of a host.
+
+        :param host: host name or address.
+        :param port: port number.
+        :returns: None
+        """
+        self._entries.pop((host, port), None)
+
+    def clear(self):
+        """
+        Drop all cached addresses.
+
+        :returns: None
+        """
+        self._entries.clear()
+
+    def __contains__(self, address):
+        """
+        :param address: tuple (host, port).
+        :returns: whether addresses of the host are cached and haven't expired.
+        """
+        entry = self._entries.get(address)
+        return entry is not None and entry[0] > timeit.default_timer()
+
+
+# DNS cache shared by connections of all SharedSessions in the process.
+DNS_CACHE = DNSCache()
+
+
+class CachedResolutionMixin(object):  # pylint: disable=too-few-public-methods
+    """
+    Mixin of urllib3 connections opening sockets to addresses from a DNSCache. The host name is kept
+    for everything else, ie. TLS server name and certificate verification.
+    """
+    dns_cache = DNS_CACHE
+
+    def _new_conn(self):
+        """
+        Open a socket to the first cached address accepting the connection.
+
+        :returns: socket.
+        """
+        host = self._dns_host
+        try:
+            addresses = self.dns_cache.resolve(host, self.port)
+        except socket.gaierror:
+            addresses = None
+        if not addresses:
+            # Let urllib3 resolve the host itself and report the failure.
+            return super(CachedResolutionMixin, self)._new_conn()
+        try:
+            for address in addresses[:-1]:
+                self._dns_host = address
+                try:
+                    return super(CachedResolutionMixin, self)._new_conn()
+                except ConnectTimeoutError:
+                    pass
+            self._dns_host = addresses[-1]
+            try:
+                return super(CachedResolutionMixin, self)._new_conn()
+            except ConnectTimeoutError:
+                self.dns_cache.invalidate(host, self.port)
+                raise
+        finally:
+            self._dns_host = host
+
+
+class TimedHTTPConnection(CachedResolutionMixin, HTTPConnection):
+    """
+    HTTP connection reporting time of establishing it to the traced call, if there is one.
+    """
+    def connect(self):
+        """
+        Connect, measuring the time if the call is traced.
+
+        :returns: None
+        """
+        span = current_span()
+        if span is None:
+            return super(TimedHTTPConnection, self).connect()
+        with span.phase('connect'):
+            return super(TimedHTTPConnection, self).connect()
+
+
+class TimedHTTPSConnection(CachedResolutionMixin, HTTPSConnection):
+    """
+    HTTPS connection reporting time of establishing it, TLS handshake included, to the traced call.
+    """
+    def connect(self):
+        """
+        Connect, measuring the time if the call is traced.
+
+        :returns: None
+        """
+        # urllib3 swaps HTTPSConnection for a DummyConnection without ssl, pylint infers that one.
+        span = current_span()
+        if span is None:
+            return super(TimedHTTPSConnection, self).connect()  # pylint: disable=no-member
+        with span.phase('connect'):
+            return super(TimedHTTPSConnection, self).connect()  # pylint: disable=no-member
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    """
+    Pool of TimedHTTPConnections.
+    """
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    """
+    Pool of TimedHTTPSConnections.
+    """
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PoolingAdapter(HTTPAdapter):
+    """
+    requests' HTTPAdapter whose pools use instrumented connections, resolving hosts through DNS_CACHE.
+    """
+    def init_poolmanager(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Create the pool manager and make it use instrumented pools.
+
+        :returns: None
+        """
+        super(PoolingAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
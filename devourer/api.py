@@ -5,19 +5,39 @@
      all the helper classes it requires to work.
 
 """
+import collections
+import hashlib
 import json
+import os
+import timeit
 from string import Formatter
 from six import with_metaclass
+from six.moves import http_cookiejar
+from six.moves.urllib.parse import urlencode
 import requests
 
+from .adapters import PoolingAdapter
+from .models import decode
+from .streaming import NDJSONStream, is_stream
+from .tracing import current_span
 
-__all__ = ['APIMethod', 'GenericAPI', 'APIError', 'PrepareCallArgs']
+
+__all__ = ['APIMethod', 'GenericAPI', 'APIError', 'PrepareCallArgs', 'SharedSession', 'Bulkhead', 'default_session']
 
 # Allows only HTTP methods. To use devourer as non-REST API wrapper, you can
 # inherit from APIMethod with whatever functionality you need and just use
 # your subclass in declarative syntax.
 ALLOWED_HTTP_METHODS = ['head', 'options', 'get', 'post', 'put', 'delete', 'patch', 'trace', 'connect']
 
+# Default number of pooled connections kept per host by a shared session.
+DEFAULT_POOL_SIZE = 10
+
+# Sessions used by API instances created without their own one, keyed by process id.
+_DEFAULT_SESSIONS = {}
+
+# A named concurrency limit shared by the APIMethods declaring it, enforced by PriorityExecutor.
+Bulkhead = collections.namedtuple('Bulkhead', ['name', 'limit'])  # pylint: disable=invalid-name
+
 
 class APIError(Exception):
     """
@@ -53,7 +73,47 @@ class PrepareCallArgs(object):  # pylint: disable=too-few-public-methods
         self.kwargs = kwargs or {}
 
 
-class APIMethod(object):
+class SharedSession(requests.Session):
+    """
+    A requests session meant to be shared by many API instances, ie. one instance per tenant credential.
+    It pools connections, but never stores cookies, so nothing the server sets for one instance is sent
+    along with requests of another. Authentication and headers are passed by API instances on every request.
+
+    Example:
+
+    >>> session = SharedSession(pool_size=20)
+    >>> apis = [TenantAPI(url, auth=credential, session=session) for credential in credentials]
+    """
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        """
+        This method initializes the session, its cookie policy and connection pools.
+
+        :param pool_size: number of connections kept per host, should match the number of concurrent callers.
+        :returns: None
+        """
+        super(SharedSession, self).__init__()
+        self.cookies.set_policy(http_cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        adapter = PoolingAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+
+def default_session():
+    """
+    Return the session shared by all API instances created without an explicit one. Every process gets
+    its own session, so pre-forked workers never share pooled sockets with their parent.
+
+    :returns: SharedSession instance.
+    """
+    pid = os.getpid()
+    session = _DEFAULT_SESSIONS.get(pid)
+    if session is None:
+        _DEFAULT_SESSIONS.clear()
+        session = _DEFAULT_SESSIONS.setdefault(pid, SharedSession())
+    return session
+
+
+class APIMethod(object):  # pylint: disable=too-many-instance-attributes
     """
     This class represents a single method in an API. It's able to dynamically
     create request URL using schema and call parameters. The schema uses Python 3-style
@@ -63,7 +123,8 @@ class APIMethod(object):
 
     >>> post = APIMethod('get', 'post/{id}/')
     """
-    def __init__(self, http_method, schema, requests_kwargs=None):
+    def __init__(self, http_method, schema, requests_kwargs=None, cache=None,  # pylint: disable=too-many-arguments
+                 priority=None, bulkhead=None, model=None):
         """
         This method initializes instance's properties, especially schema and parameters
         list which is inferred from schema.
@@ -72,16 +133,27 @@ class APIMethod(object):
         with parameters.
         :param http_method: HTTP method to call the API method with.
         :param requests_kwargs: any additional keyword arguments to be passed to requests call.
+        :param cache: response cache, ie. SQLiteCache, only GET methods can be cached.
+        :param priority: priority of calls in async APIs using PriorityExecutor, lower is served first.
+        :param bulkhead: name of the group sharing a concurrency limit in PriorityExecutor, method name by default,
+        or Bulkhead(name, limit) declaring the limit as well.
+        :param model: Model subclass JSON responses are decoded into, instead of dicts.
         :returns: None
         """
         self.name = None
         if http_method not in ALLOWED_HTTP_METHODS:
             raise ValueError('Unsupported HTTP method: {}'.format(http_method))
+        if cache is not None and http_method != 'get':
+            raise ValueError('Only GET methods can be cached.')
         self.http_method = http_method
         self._params = []
         self._schema = None
         self.schema = schema
         self.requests_kwargs = requests_kwargs or {}
+        self.cache = cache
+        self.priority = priority
+        self.bulkhead = bulkhead
+        self.model = model
 
     @property
     def schema(self):
@@ -120,8 +192,10 @@ class APIMethod(object):
         arguments and http method already calculated.
 
         :param kwargs: Additional parameters to be passed to remote API.
-        :param payload: The POST body to send along with the request as JSON.
-        :param data: Dict or encoded string to be sent as request body.
+        :param payload: The POST body to send along with the request as JSON. Generators and other iterators
+        are streamed as newline-delimited JSON instead.
+        :param data: Dict or encoded string to be sent as request body. Files, iterables of chunks,
+        NDJSONStream and MultipartStream are streamed without reading them whole into memory.
         :param headers: Dict of headers to be send along with api call.
         :returns: API request's result.
         """
@@ -130,8 +204,51 @@ class APIMethod(object):
             schema = self.schema.format(**kwargs)
         else:
             schema = self.schema
-        return api.invoke(self.http_method, schema, params=params, data=data, payload=payload, headers=headers,
-                          requests_kwargs=self.requests_kwargs)
+        if payload is not None and is_stream(payload):
+            data, payload = NDJSONStream(payload), None
+        content_type = getattr(data, 'content_type', None)
+        if content_type is not None:
+            headers = dict((api.headers if headers is None else headers) or {})
+            headers.setdefault('Content-Type', content_type)
+        if self.cache is None:
+            return api.invoke(self.http_method, schema, params=params, data=data, payload=payload, headers=headers,
+                              requests_kwargs=self.requests_kwargs)
+        return self.cache.fetch(self.cache_key(api, schema, params, headers),
+                                lambda: api.invoke(self.http_method, schema, params=params, data=data,
+                                                   payload=payload, headers=headers,
+                                                   requests_kwargs=self.requests_kwargs))
+
+    def cache_key(self, api, schema, params, headers=None):
+        """
+        This method builds the key a response is cached under. It's the full address of the request and a digest
+        of instance's credentials and headers, so instances with different ones (ie. tenants) never get each
+        other's responses. Caches created with `shared=True` key responses by address only, sharing them
+        between all instances.
+
+        :param api: API instance making the call.
+        :param schema: formatted method address.
+        :param params: query string parameters.
+        :param headers: headers of the call, instance's headers if None.
+        :returns: cache key.
+        """
+        address = '{}{}?{}'.format(api.url, schema, urlencode(sorted(params.items()), doseq=True))
+        if getattr(self.cache, 'shared', False):
+            return address
+        return '{}#{}'.format(address, credentials_digest(api.auth, api.headers if headers is None else headers))
+
+
+def credentials_digest(auth, headers):
+    """
+    Hash credentials and headers of a call. Auth objects are represented by their class and attributes.
+
+    :param auth: auth tuple, requests' Auth object or None.
+    :param headers: dict of headers or None.
+    :returns: hex digest.
+    """
+    if auth is not None and not isinstance(auth, (tuple, list)):
+        auth = (type(auth).__name__, sorted(getattr(auth, '__dict__', {}).items()))
+    headers = sorted((str(name).lower(), value) for name, value in (headers or {}).items())
+    return hashlib.sha256(repr((auth, headers)).encode('utf-8')).hexdigest()
 
 
 class GenericAPICreator(type):
@@ -175,8 +292,10 @@ class GenericAPICreator(type):
         for key in attrs['_methods']:
             if key in attrs:
                 del attrs[key]
-            if 'call_{}'.format(key) in attrs:
-                del attrs['call_{}'.format(key)]
+            call = attrs.pop('call_{}'.format(key), None)
+            # Inherited methods can be overridden by subclasses too.
+            if call is not None and key not in methods:
+                methods[key] = call
         methods.update(attrs)
         model = super(GenericAPICreator, mcs).__new__(mcs, name, bases, methods)
         return model
@@ -191,9 +310,11 @@ class GenericAPIBase(object):
     """
     _methods = None
 
-    def __init__(self, url, auth, throw_on_error=False, load_json=False, headers=None):
+    def __init__(self, url, auth, throw_on_error=False, load_json=False,  # pylint: disable=too-many-arguments
+                 headers=None, session=None, tracer=None):
         """
-        This method initializes a concrete API class.
+        This method initializes a concrete API class. It doesn't touch the declared methods, they are
+        shared by all the instances and receive the instance on every call, so creating one is cheap.
 
         :param url: API's base address
         :param auth: a tuple (user, password) for HTTP authentication, None for
@@ -201,6 +322,9 @@ class GenericAPIBase(object):
         :param throw_on_error: should an error be thrown on response with code >= 400
         (True) or full response object be returned (False).
         :param headers: Headers to be passed to requests call.
+        :param session: requests session used to make calls, possibly shared with other instances.
+        By default the process-wide SharedSession is used.
+        :param tracer: Tracer recording a span for every call, None disables tracing.
         :returns: None
         """
         self.url = url
@@ -208,8 +332,28 @@ class GenericAPIBase(object):
         self.throw_on_error = throw_on_error
         self.load_json = load_json
         self.headers = headers
-        for item in self._methods.values():
-            item.api = self
+        self._session = session
+        self._tracer = tracer
+
+    @property
+    def session(self):
+        """
+        Session making calls of this instance, None if it uses the process-wide default one. Methods declared
+        as `session` take precedence over this property.
+
+        :returns: requests session or None.
+        """
+        return self._session
+
+    @property
+    def tracer(self):
+        """
+        Tracer recording spans of calls, None if tracing is disabled. Methods declared as `tracer` take
+        precedence over this property.
+
+        :returns: Tracer instance or None.
+        """
+        return self._tracer
 
     def prepare(self, name, *args, **kwargs):
         """
@@ -243,9 +387,26 @@ class GenericAPIBase(object):
             raise APIError(error_msg.format(name, args, kwargs, result.__dict__), response=result)
         if self.load_json:
             content = result.content if isinstance(result.content, str) else result.content.decode('utf-8')
-            return json.loads(content)
+            span = current_span() if self._tracer is not None else None
+            if span is None:
+                return self._decode(name, content)
+            with span.phase('decode'):
+                return self._decode(name, content)
         return result.content
 
+    def _decode(self, name, content):
+        """
+        This function decodes JSON content of a response, into method's model if it has one.
+
+        :param name: name of the called method.
+        :param content: JSON document.
+        :returns: decoded content.
+        """
+        model = getattr(self._methods.get(name), 'model', None)
+        if model is None:
+            return json.loads(content)
+        return decode(content, model)
+
     def call(self, name, *args, **kwargs):
         """
         This function invokes the API method from the class declaration
@@ -256,12 +417,39 @@ class GenericAPIBase(object):
         :param kwargs: keyword arguments of API method call.
         :returns: Result of finalize_method call, by default content of API's response.
         """
+        if self._tracer is not None:
+            return self._tracer.run(self._tracer.start_span(name), self._traced_call, name, args, kwargs)
         prepared = getattr(self, 'prepare_{}'.format(name))(name, *args, **kwargs)
         return getattr(self, 'finalize_{}'.format(name))(name,
                                                          prepared.call(self, *prepared.args, **prepared.kwargs),
                                                          *prepared.args,
                                                          **prepared.kwargs)
 
+    def _traced_call(self, name, args, kwargs):
+        """
+        This function is call's counterpart used when tracing, it runs as the current span.
+
+        :param name: name of method to call.
+        :param args: non-keyword arguments of API method call.
+        :param kwargs: keyword arguments of API method call.
+        :returns: Result of finalize_method call.
+        """
+        with current_span().phase('prepare'):
+            prepared = getattr(self, 'prepare_{}'.format(name))(name, *args, **kwargs)
+        return self._traced_finish(name, prepared)
+
+    def _traced_finish(self, name, prepared):
+        """
+        This function makes a prepared call and finalizes it, timing the finalize hook of the current span.
+
+        :param name: name of method to call.
+        :param prepared: PrepareCallArgs instance.
+        :returns: Result of finalize_method call.
+        """
+        result = prepared.call(self, *prepared.args, **prepared.kwargs)
+        with current_span().phase('finalize'):
+            return getattr(self, 'finalize_{}'.format(name))(name, result, *prepared.args, **prepared.kwargs)
+
     @classmethod
     def outer_call(cls, name):
         """
@@ -273,6 +461,36 @@ class GenericAPIBase(object):
         """
         return lambda obj, *args, **kwargs: obj.call(name, *args, **kwargs)
 
+    def warmup(self, connections=None):
+        """
+        This method opens pooled connections to API's address ahead of traffic, so first calls don't pay
+        for DNS lookups, TCP and TLS handshakes. Connections which are already open are kept.
+
+        :param connections: number of connections to open, size of the pool by default.
+        :returns: number of open connections taken from the pool and returned to it.
+        """
+        session = self._session or default_session()
+        request = session.prepare_request(requests.Request('GET', self.url))
+        settings = session.merge_environment_settings(request.url, {}, None, None, None)
+        adapter = session.get_adapter(request.url)
+        if hasattr(adapter, 'get_connection_with_tls_context'):
+            pool = adapter.get_connection_with_tls_context(request, settings['verify'], settings['proxies'],
+                                                           settings['cert'])
+        else:
+            pool = adapter.get_connection(request.url, settings['proxies'])
+        count = min(connections or pool.pool.maxsize, pool.pool.maxsize)
+        taken = []
+        try:
+            for _ in range(count):
+                connection = pool._get_conn()  # pylint: disable=protected-access
+                taken.append(connection)
+                if getattr(connection, 'sock', None) is None:
+                    connection.connect()
+        finally:
+            for connection in taken:
+                pool._put_conn(connection)  # pylint: disable=protected-access
+        return len([connection for connection in taken if getattr(connection, 'sock', None) is not None])
+
     def invoke(self, http_method, url, params, data=None, payload=None, headers=None, requests_kwargs=None):
         """
         This method makes a request to given API address concatenating the method
@@ -287,8 +505,22 @@ class GenericAPIBase(object):
         """
         headers = headers or self.headers
         kwargs = requests_kwargs or {}
-        return getattr(requests, http_method)(self.url + url, auth=self.auth, params=params, data=data, json=payload,
-                                              headers=headers, **kwargs)
+        session = self._session or default_session()
+        span = current_span() if self._tracer is not None else None
+        if span is None:
+            return session.request(http_method.upper(), self.url + url, auth=self.auth, params=params, data=data,
+                                   json=payload, headers=headers, **kwargs)
+        stream = kwargs.get('stream', False)
+        connect = span.phases.get('connect', 0.0)
+        started = timeit.default_timer()
+        response = session.request(http_method.upper(), self.url + url, auth=self.auth, params=params, data=data,
+                                   json=payload, headers=dict(headers or {}, traceparent=span.traceparent),
+                                   **dict(kwargs, stream=True))
+        span.add('ttfb', timeit.default_timer() - started - (span.phases.get('connect', 0.0) - connect))
+        if not stream:
+            with span.phase('download'):
+                response.content  # pylint: disable=pointless-statement
+        return response
 
 
 class GenericAPI(with_metaclass(GenericAPICreator, GenericAPIBase)):
@@ -4,13 +4,19 @@
     :synopsis: This module extends basic api with gevent-based async capabilities.
 
 """
+import os
+import timeit
+import warnings
 from functools import partial
 
 from concurrent.futures import ThreadPoolExecutor
 from six import with_metaclass
 
+from .api import Bulkhead
+from .api import DEFAULT_POOL_SIZE
 from .api import GenericAPIBase
 from .api import GenericAPICreator
+from .completion import as_completed
 
 
 # Default time (seconds) to wait for thread before timing out.
@@ -22,6 +28,29 @@ DEFAULT_EXECUTOR = ThreadPoolExecutor  # pylint: disable=invalid-name
 # Default number of executors for an API instance.
 DEFAULT_EXECUTORS = 2
 
+# Number of workers of the executor shared by instances created without their own one, matching
+# the number of connections the default session keeps per host.
+DEFAULT_SHARED_EXECUTORS = DEFAULT_POOL_SIZE
+
+# Executors used by API instances created without their own one, keyed by process id.
+_DEFAULT_EXECUTORS = {}
+
+
+def default_executor():
+    """
+    Return the executor shared by all async API instances created without executor settings, so many
+    instances (ie. one per tenant) don't start threads of their own. Every process gets its own executor,
+    as threads don't survive a fork.
+
+    :returns: ThreadPoolExecutor instance.
+    """
+    pid = os.getpid()
+    executor = _DEFAULT_EXECUTORS.get(pid)
+    if executor is None:
+        _DEFAULT_EXECUTORS.clear()
+        executor = _DEFAULT_EXECUTORS.setdefault(pid, ThreadPoolExecutor(max_workers=DEFAULT_SHARED_EXECUTORS))
+    return executor
+
 
 class AsyncAPIBase(GenericAPIBase):
     """This is the async API representation class without declarative syntax.
@@ -34,20 +63,24 @@ class AsyncAPIBase(GenericAPIBase):
 
     def __init__(self, *args, **kwargs):
         """
-        Add async settings and invoke base initializer.
+        Add async settings and invoke base initializer. Instances created without executor settings share
+        the process-wide default_executor().
         :param args:
-        :param executors: number of concurrent executor workers.
-        :param executor_class: executor class.
+        :param executors: number of concurrent executor workers of instance's own executor.
+        :param executor_class: class of instance's own executor.
         :param executor: executor instance. Takes priority over executor_class.
         :param kwargs:
         """
         executor = kwargs.pop('executor', None)
-        executors = kwargs.pop('executors', DEFAULT_EXECUTORS)
-        executor_class = kwargs.pop('executor_class', DEFAULT_EXECUTOR)
+        executors = kwargs.pop('executors', None)
+        executor_class = kwargs.pop('executor_class', None)
         if executor:
             self._executor = executor
+        elif executors is None and executor_class is None:
+            self._executor = default_executor()
         else:
-            self._executor = executor_class(max_workers=executors)
+            self._executor = (executor_class or DEFAULT_EXECUTOR)(max_workers=executors or DEFAULT_EXECUTORS)
+        self._pending = set()
         super(AsyncAPIBase, self).__init__(*args, **kwargs)
 
     def call(self, name, *args, **kwargs):
@@ -55,11 +88,69 @@ class AsyncAPIBase(GenericAPIBase):
         This function invokes the API method from the class declaration
         according to the name parameter along with all the hooks.
 
+        Executors providing a `schedule` method, like PriorityExecutor, receive call's priority (`_priority`
+        keyword argument or APIMethod's priority) and bulkhead (APIMethod's bulkhead or method's name),
+        with its limit if the bulkhead is declared as Bulkhead(name, limit).
+
+        `_on_success` and `_on_error` keyword arguments register callbacks receiving call's result or exception
+        as soon as it completes, in the thread which completed it.
+
         :param name: name of method to call.
         :param args: non-keyword arguments of API method call.
         :param kwargs: keyword arguments of API method call.
-        :returns: Result of finalize_method call, by default content of API's response.
+        :returns: Future of finalize_method call result, by default content of API's response.
+        """
+        on_success = kwargs.pop('_on_success', None)
+        on_error = kwargs.pop('_on_error', None)
+        future = self._start(name, args, kwargs)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        if on_success is not None or on_error is not None:
+            future.add_done_callback(partial(self._complete, on_success, on_error))
+        return future
+
+    @staticmethod
+    def _complete(on_success, on_error, future):
+        """
+        This function passes result of a completed call to its callbacks.
+
+        :param on_success: callable receiving the result or None.
+        :param on_error: callable receiving the exception or None.
+        :param future: completed Future of the call.
+        :returns: None
+        """
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            if on_success is not None:
+                on_success(future.result())
+        elif on_error is not None:
+            on_error(error)
+
+    def as_completed(self, futures=None, timeout=None):
+        """
+        This function iterates over futures in order of completion, so fast calls are handled without
+        waiting for slow ones submitted earlier. With GeventExecutor, iterate from the thread running the hub.
+
+        :param futures: futures of a group of calls, all calls of this instance in progress by default.
+        :param timeout: time (seconds) to wait for all futures, None means no limit.
+        :returns: generator of completed futures.
+        """
+        return as_completed(set(self._pending) if futures is None else futures, timeout)
+
+    def _start(self, name, args, kwargs):
         """
+        This function prepares the call and hands it over to the executor.
+
+        :param name: name of method to call.
+        :param args: non-keyword arguments of API method call.
+        :param kwargs: keyword arguments of API method call.
+        :returns: Future of the call.
+        """
+        priority = kwargs.pop('_priority', None)
+        if self._tracer is not None:
+            return self._traced_submit(name, priority, args, kwargs)
         prepared = getattr(self, 'prepare_{}'.format(name))(name, *args, **kwargs)
         method_partial = partial(prepared.call, self, *prepared.args, **prepared.kwargs)
         callback_partial = partial(
@@ -68,8 +159,59 @@ class AsyncAPIBase(GenericAPIBase):
             *prepared.args,
             **prepared.kwargs
         )
-        future = self._executor.submit(lambda c, m: c(m()), callback_partial, method_partial)
-        return future
+        return self._submit(name, priority, lambda: callback_partial(method_partial()))
+
+    def _submit(self, name, priority, work):
+        """
+        This function hands the work of a call over to the executor.
+
+        :param name: name of called method.
+        :param priority: priority of the call, APIMethod's one if None.
+        :param work: callable doing the request and finalizing it.
+        :returns: Future of the call.
+        """
+        schedule = getattr(self._executor, 'schedule', None)
+        if schedule is None:
+            return self._executor.submit(work)
+        method = self._methods.get(name)
+        if priority is None:
+            priority = getattr(method, 'priority', None)
+        bulkhead = getattr(method, 'bulkhead', None)
+        if isinstance(bulkhead, Bulkhead):
+            return schedule(work, priority=priority, group=bulkhead.name, limit=bulkhead.limit)
+        if bulkhead is not None and bulkhead not in getattr(self._executor, 'bulkheads', {}):
+            warnings.warn('Bulkhead {} of method {} has no limit, declare it with Bulkhead(name, limit) or '
+                          'in the executor.'.format(bulkhead, name))
+        return schedule(work, priority=priority, group=bulkhead or name)
+
+    def _traced_submit(self, name, priority, args, kwargs):
+        """
+        This function is call's counterpart used when tracing. The span also records time the call
+        waited for an executor worker.
+
+        :param name: name of method to call.
+        :param priority: priority of the call.
+        :param args: non-keyword arguments of API method call.
+        :param kwargs: keyword arguments of API method call.
+        :returns: Future of the call.
+        """
+        span = self._tracer.start_span(name)
+        try:
+            with span.phase('prepare'):
+                prepared = getattr(self, 'prepare_{}'.format(name))(name, *args, **kwargs)
+        except Exception as error:
+            self._tracer.finish(span, error)
+            raise
+        submitted = timeit.default_timer()
+
+        def work():
+            """
+            Make the call as current span of the worker.
+            """
+            span.add('queue_wait', timeit.default_timer() - submitted)
+            return self._tracer.run(span, self._traced_finish, name, prepared)
+
+        return self._submit(name, priority, work)
 
 
 class AsyncAPI(with_metaclass(GenericAPICreator, AsyncAPIBase)):
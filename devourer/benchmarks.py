@@ -0,0 +1,159 @@
+"""
+.. module:: benchmarks
+    :platform: Unix, Windows
+    :synopsis: This module contains benchmarks run against the local stand-in server,
+     use `python -m devourer.benchmarks` to run them.
+
+"""
+from __future__ import print_function
+
+import json
+import timeit
+
+from concurrent.futures import ThreadPoolExecutor
+
+from . import GenericAPI, AsyncAPI, APIMethod, SharedSession
+from .models import Field, Model, decode
+from .testing import StandInServer
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None  # pylint: disable=invalid-name
+
+
+# Number of tenant instances created by the tenant benchmark.
+TENANTS = 10000
+
+# Number of records decoded by the model benchmark.
+RECORDS = 200000
+
+
+class BenchmarkAPI(GenericAPI):
+    """
+    API used by benchmarks.
+    """
+    posts = APIMethod('get', 'posts/')
+    post = APIMethod('get', 'posts/{id}/')
+
+
+class AsyncBenchmarkAPI(AsyncAPI):
+    """
+    Async API used by benchmarks.
+    """
+    posts = APIMethod('get', 'posts/')
+    post = APIMethod('get', 'posts/{id}/')
+
+
+# Call mix of BenchmarkAPI for `python -m devourer.loadtest devourer.benchmarks.BenchmarkAPI devourer.benchmarks.MIX`.
+MIX = [('posts', 1), ('post', 9, lambda rand: {'id': rand.randint(1, 100)})]
+
+
+class Post(Model):
+    """
+    Model used by benchmarks.
+    """
+    post_id = Field(int, key='id')
+    user_id = Field(int, key='userId')
+    title = Field(str)
+    body = Field(str)
+
+
+def report(name, seconds, count):
+    """
+    Print benchmark's result.
+
+    :param name: name of the benchmark.
+    :param seconds: total time it took.
+    :param count: number of operations.
+    :returns: None
+    """
+    print('{:<40} {:>10.3f}s total {:>12.2f}us/op'.format(name, seconds, seconds / count * 1e6))
+
+
+def bench_tenants(url, count=TENANTS):
+    """
+    Create an instance per tenant, each with its own credentials and headers, and make a call through every one
+    of them. All instances share a single session (and executor in async case).
+
+    :param url: API's base address.
+    :param count: number of tenant instances.
+    :returns: None
+    """
+    session = SharedSession()
+    start = timeit.default_timer()
+    apis = [BenchmarkAPI(url, ('tenant{}'.format(i), 'secret'), load_json=True, session=session,
+                         headers={'X-Tenant': str(i)}) for i in range(count)]
+    report('create {} tenant instances'.format(count), timeit.default_timer() - start, count)
+
+    start = timeit.default_timer()
+    for i, api in enumerate(apis):
+        api.post(id=i % 100 + 1)
+    report('call {} tenant instances'.format(count), timeit.default_timer() - start, count)
+
+    executor = ThreadPoolExecutor(max_workers=8)
+    session = SharedSession(pool_size=8)
+    start = timeit.default_timer()
+    apis = [AsyncBenchmarkAPI(url, ('tenant{}'.format(i), 'secret'), load_json=True, session=session,
+                              executor=executor, headers={'X-Tenant': str(i)}) for i in range(count)]
+    report('create {} async tenant instances'.format(count), timeit.default_timer() - start, count)
+
+    start = timeit.default_timer()
+    futures = [api.post(id=i % 100 + 1) for i, api in enumerate(apis)]
+    for future in futures:
+        future.result()
+    report('call {} async tenant instances'.format(count), timeit.default_timer() - start, count)
+    executor.shutdown()
+
+
+def measure(function):
+    """
+    Run a function, measuring memory taken by its result and peak memory usage. Memory isn't measured
+    without tracemalloc (Python 2).
+
+    :param function: callable to measure.
+    :returns: tuple (result, retained bytes, peak bytes, seconds), bytes are None if not measured.
+    """
+    if tracemalloc is None:  # pragma: no cover
+        start = timeit.default_timer()
+        result = function()
+        return result, None, None, timeit.default_timer() - start
+    tracemalloc.start()
+    start = timeit.default_timer()
+    result = function()
+    seconds = timeit.default_timer() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, peak, seconds
+
+
+def bench_models(count=RECORDS):
+    """
+    Compare memory taken by a list of posts decoded into dicts and into models.
+
+    :param count: number of posts.
+    :returns: None
+    """
+    content = json.dumps([{'userId': i // 10, 'id': i, 'title': 'post {}'.format(i), 'body': 'body of post'}
+                          for i in range(count)])
+    for name, function in (('json.loads', lambda: json.loads(content)), ('models', lambda: decode(content, Post))):
+        result, retained, peak, seconds = measure(function)
+        report('decode {} posts with {}'.format(count, name), seconds, count)
+        if retained is not None:
+            print('{:<40} {:>10.1f}MB retained {:>10.1f}MB peak'.format('', retained / 1e6, peak / 1e6))
+        del result
+
+
+def main():
+    """
+    Run all benchmarks against a fresh stand-in server.
+
+    :returns: None
+    """
+    bench_models()
+    with StandInServer() as server:
+        bench_tenants(server.url)
+
+
+if __name__ == '__main__':
+    main()
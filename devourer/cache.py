@@ -0,0 +1,214 @@
+"""
+.. module:: cache
+    :platform: Unix, Windows
+    :synopsis: This module contains a response cache shared by all processes on a host, backed by SQLite in WAL mode.
+
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+__all__ = ['SQLiteCache']
+
+# Default time (seconds) a cached response stays fresh.
+DEFAULT_TTL = 60.0
+
+# Default limit (bytes) of cached response bodies.
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# Default time (seconds) a worker may hold the refresh lock of a key.
+DEFAULT_LOCK_TIMEOUT = 10.0
+
+# Time (seconds) between checks while waiting for another worker to refresh a key.
+POLL_INTERVAL = 0.01
+
+# Headers which don't describe the cached, already decoded body.
+SKIPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'connection', 'keep-alive')
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, status INTEGER, headers TEXT, content BLOB, '
+    'url TEXT, encoding TEXT, size INTEGER, stored REAL, expires REAL)',
+    'CREATE INDEX IF NOT EXISTS responses_stored ON responses (stored)',
+    'CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, expires REAL)',
+]
+
+
+class SQLiteCache(object):
+    """
+    A cache of GET responses living in an SQLite database, so that all processes on a host - ie. pre-forked web
+    workers - share it. Entries keep the encoded body along with status and headers, so a hit skips the network
+    entirely. Only one process refreshes a stale entry at a time, others keep getting the stale one meanwhile.
+
+    Responses are cached separately for every set of credentials and headers, unless the cache is `shared` -
+    then they're keyed by address only and served to every API instance, so use it for public data only.
+
+    Example:
+
+    >>> CACHE = SQLiteCache('/var/run/myapp/api-cache.sqlite', ttl=300)
+    >>>
+    >>> class ReferenceAPI(GenericAPI):
+    >>>     countries = APIMethod('get', 'countries/', cache=CACHE)
+    """
+    def __init__(self, path, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE,  # pylint: disable=too-many-arguments
+                 lock_timeout=DEFAULT_LOCK_TIMEOUT, shared=False):
+        """
+        This method initializes cache settings, the database is opened on first use in each process and thread.
+
+        :param path: path of the database file.
+        :param ttl: time (seconds) a response stays fresh.
+        :param max_size: limit (bytes) of cached bodies, oldest entries are evicted when it's exceeded.
+        :param lock_timeout: time (seconds) after which a refresh lock is considered abandoned.
+        :param shared: share responses between instances regardless of their credentials and headers.
+        :returns: None
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock_timeout = lock_timeout
+        self.shared = shared
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        """
+        Database connection of current process and thread.
+
+        :returns: sqlite3 connection.
+        """
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            connection = sqlite3.connect(self.path, timeout=self.lock_timeout)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                for statement in SCHEMA:
+                    connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def get(self, key):
+        """
+        Return cached response and its freshness.
+
+        :param key: cache key.
+        :returns: tuple (response, fresh) or None if key isn't cached.
+        """
+        row = self.connection.execute('SELECT status, headers, content, url, encoding, expires FROM responses '
+                                      'WHERE key = ?', (key, )).fetchone()
+        if row is None:
+            return None
+        response = requests.Response()
+        response.status_code = row[0]
+        response.headers = CaseInsensitiveDict(json.loads(row[1]))
+        response._content = bytes(row[2])  # pylint: disable=protected-access
+        response.url = row[3]
+        response.encoding = row[4]
+        return response, row[5] > time.time()
+
+    def set(self, key, response, ttl=None):
+        """
+        Store a response and evict oldest entries if the cache got too big.
+
+        :param key: cache key.
+        :param response: requests' response object.
+        :param ttl: time (seconds) the response stays fresh, cache's ttl by default.
+        :returns: None
+        """
+        now = time.time()
+        headers = dict((name, value) for name, value in response.headers.items()
+                       if name.lower() not in SKIPPED_HEADERS)
+        content = response.content
+        with self.connection as connection:
+            connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                               (key, response.status_code, json.dumps(headers), sqlite3.Binary(content),
+                                response.url, response.encoding, len(content), now,
+                                now + (self.ttl if ttl is None else ttl)))
+            self._evict(connection)
+
+    def _evict(self, connection):
+        """
+        Remove expired entries, then the oldest ones, until cached bodies fit in max_size.
+
+        :param connection: database connection within a transaction.
+        :returns: None
+        """
+        excess = connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0] - self.max_size
+        if excess <= 0:
+            return
+        connection.execute('DELETE FROM responses WHERE expires <= ?', (time.time(), ))
+        evicted = []
+        for key, size in connection.execute('SELECT key, size FROM responses ORDER BY stored'):
+            if excess <= 0:
+                break
+            evicted.append((key, ))
+            excess -= size
+        connection.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+    def acquire(self, key):
+        """
+        Try to become the only process refreshing a key.
+
+        :param key: cache key.
+        :returns: True if the lock was acquired.
+        """
+        now = time.time()
+        with self.connection as connection:
+            connection.execute('DELETE FROM locks WHERE key = ? AND expires <= ?', (key, now))
+            cursor = connection.execute('INSERT OR IGNORE INTO locks VALUES (?, ?)', (key, now + self.lock_timeout))
+            return cursor.rowcount == 1
+
+    def release(self, key):
+        """
+        Release refresh lock of a key.
+
+        :param key: cache key.
+        :returns: None
+        """
+        with self.connection as connection:
+            connection.execute('DELETE FROM locks WHERE key = ?', (key, ))
+
+    def clear(self):
+        """
+        Remove all entries and locks.
+
+        :returns: None
+        """
+        with self.connection as connection:
+            connection.execute('DELETE FROM responses')
+            connection.execute('DELETE FROM locks')
+
+    def fetch(self, key, fetch):
+        """
+        Return cached response, calling fetch and storing its result when the entry is missing or stale.
+        Error responses (status >= 400) are returned, but never stored.
+
+        :param key: cache key.
+        :param fetch: callable making the actual request, returns requests' response object.
+        :returns: requests' response object.
+        """
+        deadline = time.time() + self.lock_timeout
+        while True:
+            entry = self.get(key)
+            if entry is not None and entry[1]:
+                return entry[0]
+            if self.acquire(key):
+                break
+            if entry is not None:
+                return entry[0]
+            if time.time() > deadline:
+                return fetch()
+            time.sleep(POLL_INTERVAL)
+        try:
+            response = fetch()
+            if response.status_code < 400:
+                self.set(key, response)
+            return response
+        finally:
+            self.release(key)
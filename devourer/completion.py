@@ -0,0 +1,177 @@
+"""
+.. module:: completion
+    :platform: Unix, Windows
+    :synopsis: This module contains completion queues - futures of async calls delivered in order of completion,
+     to one or many consumer threads.
+
+"""
+import threading
+import timeit
+
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from six.moves import queue
+
+try:
+    from gevent import wait as wait_greenlets
+except ImportError:  # pragma: no cover
+    wait_greenlets = None  # pylint: disable=invalid-name
+
+
+__all__ = ['CompletionQueue', 'as_completed']
+
+# Tells consumers the queue is closed and drained.
+_DRAINED = object()
+
+
+class CompletionQueue(object):
+    """
+    A queue receiving futures as they complete, so results are handled in order of completion instead of
+    submission, without a thread waiting for every future. Many threads can drain it at once.
+
+    With maxsize given, adding waits while maxsize futures haven't been taken yet, so slow consumers hold back
+    the producer instead of results piling up in memory. Completing futures never wait, but consumers have to
+    drain the queue while futures are added then, ie. in other threads.
+
+    Futures of GeventExecutor are waited for by letting their greenlets run, so their queue can be drained
+    from the thread running gevent's hub. A bounded queue needs threading monkey patched then.
+
+    Example:
+
+    >>> completions = CompletionQueue(maxsize=100)
+    >>> consumers = [threading.Thread(target=lambda: [handle(future.result()) for future in completions])
+    >>>              for _ in range(4)]
+    >>> for consumer in consumers:
+    >>>     consumer.start()
+    >>> for post_id in post_ids:
+    >>>     completions.add(api.post(id=post_id))
+    >>> completions.close()
+    """
+    def __init__(self, maxsize=0):
+        """
+        :param maxsize: maximum number of added futures not taken yet, 0 means no limit.
+        :returns: None
+        """
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(maxsize) if maxsize > 0 else None
+        self._lock = threading.Lock()
+        self._greenlets = set()
+        self._outstanding = 0
+        self._closed = False
+
+    def add(self, future):
+        """
+        Deliver the future to the queue once it completes, waiting for a free slot if the queue is bounded.
+
+        :param future: concurrent.futures.Future instance.
+        :returns: the future.
+        """
+        if self._slots is not None:
+            self._slots.acquire()
+        with self._lock:
+            if self._closed:
+                if self._slots is not None:
+                    self._slots.release()
+                raise ValueError('Cannot add futures to a closed CompletionQueue.')
+            self._outstanding += 1
+            if getattr(future, 'greenlet', None) is not None:
+                self._greenlets.add(future.greenlet)
+        future.add_done_callback(self._deliver)
+        return future
+
+    def _deliver(self, future):
+        """
+        Put a completed future to the queue, without ever blocking the callback.
+
+        :param future: completed future.
+        :returns: None
+        """
+        with self._lock:
+            self._greenlets.discard(getattr(future, 'greenlet', None))
+        self._queue.put(future)
+
+    def _join(self, timeout):
+        """
+        Let greenlets of added futures run until one of them completes or timeout passes, as waiting
+        for the queue would block gevent's hub and the greenlets with it.
+
+        :param timeout: time (seconds) to wait, None means no limit.
+        :returns: timeout left for the queue.
+        """
+        with self._lock:
+            greenlets = [greenlet for greenlet in self._greenlets if not greenlet.ready()]
+        if not greenlets or not self._queue.empty():
+            return timeout
+        wait_greenlets(greenlets, timeout=timeout, count=1)
+        return 0
+
+    def close(self):
+        """
+        Stop accepting futures. Consumers stop once every added future has been taken.
+
+        :returns: None
+        """
+        with self._lock:
+            self._closed = True
+            drained = not self._outstanding
+        if drained:
+            self._queue.put(_DRAINED)
+
+    def get(self, timeout=None):
+        """
+        Take the next completed future.
+
+        :param timeout: time (seconds) to wait, None means no limit.
+        :returns: completed future or None when the queue is closed and every future has been taken.
+        :raises queue.Empty: when no future completes in time.
+        """
+        future = self._queue.get(timeout=self._join(timeout))
+        if future is _DRAINED:
+            self._queue.put(_DRAINED)
+            return None
+        with self._lock:
+            self._outstanding -= 1
+            drained = self._closed and not self._outstanding
+        if self._slots is not None:
+            self._slots.release()
+        if drained:
+            self._queue.put(_DRAINED)
+        return future
+
+    def __len__(self):
+        """
+        :returns: number of added futures not taken yet.
+        """
+        return self._outstanding
+
+    def __iter__(self):
+        future = self.get()
+        while future is not None:
+            yield future
+            future = self.get()
+
+
+def as_completed(futures, timeout=None):
+    """
+    Iterate over futures in order of completion. Unlike concurrent.futures.as_completed, it only relies
+    on done callbacks, so it works with futures of executors subclassing concurrent.futures.Executor.
+    Futures of GeventExecutor have to be waited for from the thread running gevent's hub.
+
+    :param futures: iterable of futures, duplicates are yielded once.
+    :param timeout: time (seconds) to wait for all futures, None means no limit.
+    :returns: generator of completed futures.
+    :raises concurrent.futures.TimeoutError: when futures don't complete in time.
+    """
+    deadline = None if timeout is None else timeit.default_timer() + timeout
+    completions = CompletionQueue()
+    for future in set(futures):
+        completions.add(future)
+    completions.close()
+    while True:
+        remaining = None if deadline is None else max(deadline - timeit.default_timer(), 0)
+        try:
+            future = completions.get(timeout=remaining)
+        except queue.Empty:
+            raise FuturesTimeoutError('{} futures unfinished'.format(len(completions)))
+        if future is None:
+            return
+        yield future
@@ -0,0 +1,357 @@
+"""
+.. module:: executors
+    :platform: Unix, Windows
+    :synopsis: This module contains executors for AsyncAPI other than concurrent.futures' ones.
+
+"""
+import heapq
+import itertools
+import threading
+import timeit
+import warnings
+from functools import partial
+
+from concurrent.futures import Executor, Future
+
+try:
+    from gevent import monkey
+    from gevent.pool import Pool
+except ImportError:  # pragma: no cover
+    Pool = None  # pylint: disable=invalid-name
+
+
+__all__ = ['GeventExecutor', 'GreenletFuture', 'PriorityExecutor']
+
+# Default size of greenlet pool.
+DEFAULT_GREENLETS = 100
+
+# Default number of PriorityExecutor's threads.
+DEFAULT_WORKERS = 8
+
+# Priority of calls which don't specify one, lower is served first.
+DEFAULT_PRIORITY = 10
+
+
+class GreenletFuture(Future):
+    """
+    A concurrent.futures.Future completed by a greenlet. Waiting for the result joins the greenlet,
+    so it yields to gevent's hub instead of blocking the thread, even if threading isn't monkey patched.
+    Wait for it only from the thread running the hub.
+    """
+    def __init__(self):
+        """
+        Initialize the future, greenlet is assigned by GeventExecutor.
+
+        :returns: None
+        """
+        super(GreenletFuture, self).__init__()
+        self.greenlet = None
+
+    def _join(self, timeout):
+        """
+        Let the greenlet run until it completes or timeout passes.
+
+        :param timeout: time (seconds) to wait, None means no limit.
+        :returns: timeout left for the base implementation.
+        """
+        if self.greenlet is None or self.done():
+            return timeout
+        self.greenlet.join(timeout)
+        return 0
+
+    def result(self, timeout=None):
+        """
+        Return the result of the call, see concurrent.futures.Future.result.
+
+        :param timeout: time (seconds) to wait, None means no limit.
+        :returns: result of the call.
+        """
+        return super(GreenletFuture, self).result(self._join(timeout))
+
+    def exception(self, timeout=None):
+        """
+        Return the exception raised by the call, see concurrent.futures.Future.exception.
+
+        :param timeout: time (seconds) to wait, None means no limit.
+        :returns: exception raised by the call or None.
+        """
+        return super(GreenletFuture, self).exception(self._join(timeout))
+
+
+class GeventExecutor(Executor):
+    """
+    An executor running calls in a bounded pool of greenlets instead of OS threads, returning
+    concurrent.futures-compatible futures. Submitting blocks cooperatively while the pool is full.
+
+    Requests only run concurrently when sockets are monkey patched (`gevent.monkey.patch_all()`), otherwise
+    each call blocks the hub until it's done. Keep the connection pool as big as the greenlet pool,
+    ie. `SharedSession(pool_size=n)` with `GeventExecutor(max_workers=n)`, so no connection is thrown away.
+
+    Example:
+
+    >>> api = MyAPI(url, None, executor_class=GeventExecutor, executors=1000,
+    >>>             session=SharedSession(pool_size=1000))
+    """
+    def __init__(self, max_workers=DEFAULT_GREENLETS):
+        """
+        Create the greenlet pool.
+
+        :param max_workers: maximum number of concurrently running greenlets.
+        :returns: None
+        """
+        if Pool is None:  # pragma: no cover
+            raise ImportError('gevent is required to use GeventExecutor.')
+        if not monkey.is_module_patched('socket'):
+            warnings.warn('Sockets are not monkey patched, GeventExecutor will run calls one after another.')
+        self._pool = Pool(max_workers)
+        self._pending = set()
+        self._shutdown = False
+
+    def _run(self, future, function, args, kwargs):
+        """
+        Run a call and pass its outcome to the future.
+
+        :param future: future of the call.
+        :param function: callable to run.
+        :param args: its arguments.
+        :param kwargs: its keyword arguments.
+        :returns: None
+        """
+        self._pending.discard(future)
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = function(*args, **kwargs)
+        except Exception as error:  # pylint: disable=broad-except
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def submit(self, fn, *args, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Schedule a call in the greenlet pool.
+
+        :param fn: callable to run.
+        :param args: its arguments.
+        :param kwargs: its keyword arguments.
+        :returns: GreenletFuture instance.
+        """
+        if self._shutdown:
+            raise RuntimeError('cannot schedule new futures after shutdown')
+        future = GreenletFuture()
+        self._pending.add(future)
+        future.greenlet = self._pool.spawn(self._run, future, fn, args, kwargs)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):  # pylint: disable=arguments-differ
+        """
+        Stop accepting calls, optionally waiting for the running ones.
+
+        :param wait: wait until all calls are done.
+        :param cancel_futures: cancel calls which haven't started yet.
+        :returns: None
+        """
+        self._shutdown = True
+        if cancel_futures:
+            for future in list(self._pending):
+                future.cancel()
+        if wait:
+            self._pool.join()
+
+
+class PriorityExecutor(Executor):  # pylint: disable=too-many-instance-attributes
+    """
+    A thread pool serving calls by priority (lower first, FIFO within a priority) instead of submission order,
+    with bulkheads - concurrency limits of call groups, so one endpoint can never take every worker.
+    Calls of a saturated group wait aside without blocking calls of other groups.
+
+    AsyncAPI takes priority and group of a call from its APIMethod (`priority` and `bulkhead`, method name
+    being the default group), per-call priority can be given as `_priority` keyword argument. Limits come
+    from Bulkheads declared by methods or from `bulkheads` of the executor, which take precedence.
+
+    Example:
+
+    >>> class MyAPI(AsyncAPI):
+    >>>     post = APIMethod('get', 'posts/{id}/', priority=0)
+    >>>     export = APIMethod('get', 'export/', priority=100, bulkhead=Bulkhead('bulk', 2))
+    >>>     report = APIMethod('get', 'report/', priority=100, bulkhead='reports')
+    >>>
+    >>> api = MyAPI(url, None, executor=PriorityExecutor(max_workers=8, bulkheads={'reports': 1}))
+    """
+    def __init__(self, max_workers=DEFAULT_WORKERS, bulkheads=None):
+        """
+        Initialize the queue, worker threads are started when needed.
+
+        :param max_workers: maximum number of threads.
+        :param bulkheads: dict of maximum concurrency per group name.
+        :returns: None
+        """
+        self.max_workers = max_workers
+        self.bulkheads = dict(bulkheads or {})
+        self._condition = threading.Condition()
+        self._queue = []
+        self._parked = {}
+        self._running = {}
+        self._waits = {}
+        self._counter = itertools.count()
+        self._threads = []
+        self._idle = 0
+        self._shutdown = False
+
+    def submit(self, fn, *args, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Schedule a call with default priority and no group.
+
+        :param fn: callable to run.
+        :param args: its arguments.
+        :param kwargs: its keyword arguments.
+        :returns: Future instance.
+        """
+        return self.schedule(partial(fn, *args, **kwargs))
+
+    def schedule(self, function, priority=None, group=None, limit=None):
+        """
+        Schedule a call.
+
+        :param function: callable to run, without arguments.
+        :param priority: priority of the call, lower is served first.
+        :param group: name of the bulkhead the call belongs to.
+        :param limit: concurrency limit of the group, used unless `bulkheads` of the executor set one.
+        :returns: Future instance.
+        """
+        future = Future()
+        priority = DEFAULT_PRIORITY if priority is None else priority
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            if limit is not None and group not in self.bulkheads:
+                self.bulkheads[group] = limit
+            heapq.heappush(self._queue, (priority, next(self._counter), timeit.default_timer(), future, function,
+                                         group))
+            if self._idle:
+                # The woken worker is no longer idle, so the next call doesn't count on it too.
+                self._idle -= 1
+                self._condition.notify()
+            elif len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def _take(self):
+        """
+        Pop the first call whose group has capacity left, parking the ones which don't.
+        Requires the condition to be held.
+
+        :returns: queue item or None.
+        """
+        while self._queue:
+            item = heapq.heappop(self._queue)
+            group = item[5]
+            limit = self.bulkheads.get(group)
+            if limit is not None and self._running.get(group, 0) >= limit:
+                heapq.heappush(self._parked.setdefault(group, []), item)
+                continue
+            self._running[group] = self._running.get(group, 0) + 1
+            return item
+        return None
+
+    def _release(self, group):
+        """
+        Free a slot of the group and requeue the first call parked there.
+        Requires the condition to be held.
+
+        :param group: name of the bulkhead.
+        :returns: None
+        """
+        self._running[group] -= 1
+        parked = self._parked.get(group)
+        if parked:
+            heapq.heappush(self._queue, heapq.heappop(parked))
+            if self._idle:
+                self._idle -= 1
+                self._condition.notify()
+
+    def _work(self):
+        """
+        Worker thread's loop.
+
+        :returns: None
+        """
+        while True:
+            with self._condition:
+                item = self._take()
+                while item is None:
+                    if self._shutdown:
+                        return
+                    # Whoever wakes the worker takes it off the idle count.
+                    self._idle += 1
+                    self._condition.wait()
+                    item = self._take()
+                priority, _, queued, future, function, group = item
+                self._record_wait(priority, timeit.default_timer() - queued)
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = function()
+                except Exception as error:  # pylint: disable=broad-except
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            with self._condition:
+                self._release(group)
+
+    def _record_wait(self, priority, wait):
+        """
+        Update queue wait statistics of a priority class. Requires the condition to be held.
+
+        :param priority: priority of the call.
+        :param wait: time (seconds) the call spent in the queue.
+        :returns: None
+        """
+        stats = self._waits.get(priority)
+        if stats is None:
+            stats = self._waits[priority] = {'count': 0, 'total': 0.0, 'max': 0.0}
+        stats['count'] += 1
+        stats['total'] += wait
+        stats['max'] = max(stats['max'], wait)
+
+    def queue_wait_stats(self):
+        """
+        Return queue wait time statistics per priority class.
+
+        :returns: dict of priority: {'count', 'total', 'mean', 'max'}, times in seconds.
+        """
+        with self._condition:
+            return dict((priority, dict(stats, mean=stats['total'] / stats['count']))
+                        for priority, stats in self._waits.items())
+
+    def pending(self):
+        """
+        Return the number of calls waiting for a worker, including the ones held back by bulkheads.
+
+        :returns: number of waiting calls.
+        """
+        with self._condition:
+            return len(self._queue) + sum(len(parked) for parked in self._parked.values())
+
+    def shutdown(self, wait=True, cancel_futures=False):  # pylint: disable=arguments-differ
+        """
+        Stop accepting calls, queued ones are still run unless cancelled.
+
+        :param wait: wait until all calls are done.
+        :param cancel_futures: cancel queued calls, including the ones held back by bulkheads.
+        :returns: None
+        """
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                for item in self._queue + [item for parked in self._parked.values() for item in parked]:
+                    item[3].cancel()
+                self._queue = []
+                self._parked = {}
+            self._idle = 0
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
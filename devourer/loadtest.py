@@ -0,0 +1,294 @@
+"""
+.. module:: loadtest
+    :platform: Unix, Windows
+    :synopsis: This module replays a weighted mix of calls against an API class and reports throughput, errors
+     and latency percentiles, use `python -m devourer.loadtest --help` to run it.
+
+"""
+from __future__ import division, print_function
+
+import argparse
+import bisect
+import importlib
+import json
+import random
+import sys
+import threading
+import time
+import timeit
+
+from concurrent.futures import Future
+
+from .testing import StandInServer
+
+
+__all__ = ['LoadTest', 'Report', 'load_object', 'main']
+
+# Default number of concurrent callers.
+DEFAULT_CONCURRENCY = 8
+
+# Default number of calls when neither duration nor number of calls is given.
+DEFAULT_REQUESTS = 1000
+
+# Reported latency percentiles.
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def load_object(path):
+    """
+    Import an object by its dotted path, ie. `myapp.apis.PostsAPI` or `myapp.apis:PostsAPI`.
+
+    :param path: dotted path.
+    :returns: the object.
+    """
+    module, _, name = path.rpartition(':') if ':' in path else path.rpartition('.')
+    if not module:
+        raise ValueError('{} is not a dotted path of an object.'.format(path))
+    return getattr(importlib.import_module(module), name)
+
+
+def percentile(latencies, percent):
+    """
+    Nearest-rank percentile.
+
+    :param latencies: sorted list of latencies.
+    :param percent: percentile, 0-100.
+    :returns: latency or None if there are none.
+    """
+    if not latencies:
+        return None
+    rank = int(-(-percent * len(latencies) // 100))
+    return latencies[max(rank, 1) - 1]
+
+
+class Report(object):
+    """
+    Results of a load test, per method and in total.
+    """
+    def __init__(self, samples, elapsed):
+        """
+        :param samples: list of (method name, latency in seconds, exception name or None).
+        :param elapsed: duration (seconds) of the test.
+        :returns: None
+        """
+        self.samples = samples
+        self.elapsed = elapsed
+
+    def method_stats(self, samples):
+        """
+        Compute statistics of samples.
+
+        :param samples: list of (method name, latency, error).
+        :returns: dict with count, errors (by exception name), throughput (calls/s) and latencies (seconds).
+        """
+        latencies = sorted(sample[1] for sample in samples)
+        errors = {}
+        for _, _, error in samples:
+            if error is not None:
+                errors[error] = errors.get(error, 0) + 1
+        stats = {'count': len(samples), 'errors': errors, 'error_rate': sum(errors.values()) / (len(samples) or 1),
+                 'throughput': len(samples) / self.elapsed if self.elapsed else 0.0,
+                 'mean': sum(latencies) / len(latencies) if latencies else None,
+                 'max': latencies[-1] if latencies else None}
+        for percent in PERCENTILES:
+            stats['p{:g}'.format(percent)] = percentile(latencies, percent)
+        return stats
+
+    def to_dict(self):
+        """
+        :returns: JSON-serializable dict with elapsed time, total and per method statistics.
+        """
+        methods = {}
+        for sample in self.samples:
+            methods.setdefault(sample[0], []).append(sample)
+        return {'elapsed': self.elapsed, 'total': self.method_stats(self.samples),
+                'methods': dict((name, self.method_stats(samples)) for name, samples in methods.items())}
+
+    def format(self):
+        """
+        :returns: human-readable table, latencies in milliseconds.
+        """
+        data = self.to_dict()
+        columns = ['mean'] + ['p{:g}'.format(percent) for percent in PERCENTILES] + ['max']
+        lines = ['{:<24} {:>8} {:>8} {:>10} '.format('method', 'calls', 'errors', 'calls/s') +
+                 ' '.join('{:>9}'.format(column) for column in columns)]
+        rows = sorted(data['methods'].items()) + [('total', data['total'])]
+        for name, stats in rows:
+            lines.append('{:<24} {:>8} {:>8} {:>10.1f} '.format(name, stats['count'], sum(stats['errors'].values()),
+                                                                 stats['throughput']) +
+                         ' '.join('{:>9.2f}'.format(stats[column] * 1000) if stats[column] is not None else
+                                  '{:>9}'.format('-') for column in columns))
+        lines.append('elapsed {:.2f}s'.format(data['elapsed']))
+        return '\n'.join(lines)
+
+
+class LoadTest(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Load test driving calls of an API instance from a pool of caller threads. Calls go through the usual
+    hooks (prepare, call, finalize), futures of async APIs are waited for.
+
+    A mix is a list of (method name, weight) or (method name, weight, arguments) tuples, where arguments are
+    a dict of keyword arguments, or a callable receiving a random.Random instance and returning one.
+
+    In closed loop every caller makes its next call as soon as the previous one ends. In open loop calls
+    start at a fixed rate regardless of how fast they end. Latency is measured from the moment a call was
+    scheduled to start, so calls delayed because every caller was busy include the delay (coordinated
+    omission correction).
+
+    Example:
+
+    >>> mix = [('posts', 1), ('post', 9, lambda rand: {'id': rand.randint(1, 100)})]
+    >>> report = LoadTest(api, mix, rate=200, duration=30).run()
+    >>> print(report.format())
+    """
+    def __init__(self, api, mix, concurrency=DEFAULT_CONCURRENCY, rate=None,  # pylint: disable=too-many-arguments
+                 duration=None, requests=None, seed=None):
+        """
+        :param api: GenericAPI or AsyncAPI instance.
+        :param mix: list of (method name, weight[, arguments]) tuples.
+        :param concurrency: number of caller threads.
+        :param rate: calls per second in open loop, closed loop if None.
+        :param duration: seconds to run for.
+        :param requests: number of calls to make, DEFAULT_REQUESTS if duration isn't given either.
+        :param seed: seed of the random generator picking calls.
+        :returns: None
+        """
+        if not mix:
+            raise ValueError('The call mix is empty.')
+        if rate is not None and rate <= 0:
+            raise ValueError('Rate has to be positive.')
+        self.api = api
+        self.names = [entry[0] for entry in mix]
+        self.arguments = [entry[2] if len(entry) > 2 else None for entry in mix]
+        self.cumulative = []
+        total = 0
+        for entry in mix:
+            total += entry[1]
+            self.cumulative.append(total)
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.requests = requests if requests is not None or duration is not None else DEFAULT_REQUESTS
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._start = None
+
+    def next_call(self):
+        """
+        Pick the next call and its scheduled start.
+
+        :returns: tuple (scheduled start, method name, kwargs) or None when the test is over.
+        """
+        with self._lock:
+            now = timeit.default_timer()
+            if self.requests is not None and self._issued >= self.requests:
+                return None
+            scheduled = self._start + self._issued / self.rate if self.rate else now
+            if self.duration is not None and scheduled - self._start >= self.duration:
+                return None
+            self._issued += 1
+            index = bisect.bisect_right(self.cumulative, self.random.random() * self.cumulative[-1])
+            arguments = self.arguments[index]
+            kwargs = arguments(self.random) if callable(arguments) else dict(arguments or {})
+            return scheduled, self.names[index], kwargs
+
+    def caller(self, samples):
+        """
+        Make calls until the test is over.
+
+        :param samples: list collecting (method name, latency, error) of this caller.
+        :returns: None
+        """
+        while True:
+            picked = self.next_call()
+            if picked is None:
+                return
+            scheduled, name, kwargs = picked
+            delay = scheduled - timeit.default_timer()
+            if delay > 0:
+                time.sleep(delay)
+            error = None
+            try:
+                result = getattr(self.api, name)(**kwargs)
+                if isinstance(result, Future):
+                    result.result()
+            except Exception as exception:  # pylint: disable=broad-except
+                error = type(exception).__name__
+            samples.append((name, timeit.default_timer() - scheduled, error))
+
+    def run(self):
+        """
+        Run the test.
+
+        :returns: Report instance.
+        """
+        self._issued = 0
+        self._start = timeit.default_timer()
+        collected = [[] for _ in range(self.concurrency)]
+        threads = [threading.Thread(target=self.caller, args=(samples,)) for samples in collected]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return Report([sample for samples in collected for sample in samples], timeit.default_timer() - self._start)
+
+
+def parse_args(argv=None):
+    """
+    Parse command line arguments.
+
+    :param argv: list of arguments, sys.argv by default.
+    :returns: argparse.Namespace.
+    """
+    parser = argparse.ArgumentParser(prog='python -m devourer.loadtest',
+                                     description='Replay a weighted call mix against an API class.')
+    parser.add_argument('api', help='dotted path of the API class, ie. myapp.apis.PostsAPI')
+    parser.add_argument('mix', help='dotted path of the call mix, a list of (method, weight[, arguments]) tuples')
+    parser.add_argument('--init', default='{}', type=json.loads,
+                        help='JSON object of keyword arguments for the API class, ie. {"url": ..., "auth": null}')
+    parser.add_argument('--mode', choices=('closed', 'open'), default=None,
+                        help='closed loop (default) or open loop at --rate')
+    parser.add_argument('--rate', type=float, help='calls per second, implies open loop')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='number of concurrent callers')
+    parser.add_argument('--duration', type=float, help='seconds to run for')
+    parser.add_argument('--requests', type=int, help='number of calls to make')
+    parser.add_argument('--seed', type=int, help='seed of the random generator picking calls')
+    parser.add_argument('--stand-in', action='store_true',
+                        help='start the local stand-in server and use it as API\'s url unless --init gives one')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args(argv)
+    if args.mode == 'open' and args.rate is None:
+        parser.error('open loop requires --rate')
+    if args.mode == 'closed' and args.rate is not None:
+        parser.error('--rate is only used in open loop')
+    return args
+
+
+def main(argv=None):
+    """
+    Run a load test from the command line.
+
+    :param argv: list of arguments, sys.argv by default.
+    :returns: report as a dict.
+    """
+    args = parse_args(argv)
+    server = StandInServer().start() if args.stand_in else None
+    kwargs = dict(args.init)
+    if server is not None:
+        kwargs.setdefault('url', server.url)
+        kwargs.setdefault('auth', None)
+    try:
+        api = load_object(args.api)(**kwargs)
+        report = LoadTest(api, load_object(args.mix), concurrency=args.concurrency, rate=args.rate,
+                          duration=args.duration, requests=args.requests, seed=args.seed).run()
+    finally:
+        if server is not None:
+            server.stop()
+    print(json.dumps(report.to_dict(), indent=2, sort_keys=True) if args.json else report.format())
+    return report.to_dict()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,224 @@
+"""
+.. module:: models
+    :platform: Unix, Windows
+    :synopsis: This module contains declarative result models - compact __slots__ records JSON responses
+     are decoded into, one element at a time.
+
+"""
+import itertools
+import json
+
+from six import with_metaclass
+
+
+__all__ = ['Model', 'Field', 'decode']
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+# Keeps track of field declaration order.
+_COUNTER = itertools.count()
+
+# Marks keys missing from decoded objects.
+_MISSING = object()
+
+
+class Field(object):  # pylint: disable=too-few-public-methods
+    """
+    A single field of a Model.
+
+    Example:
+
+    >>> class Post(Model):
+    >>>     id = Field(int)
+    >>>     user_id = Field(int, key='userId')
+    >>>     comments = Field([Comment], default=())
+    """
+    def __init__(self, kind=None, key=None, default=None, coerce=False):
+        """
+        :param kind: type of the field. A Model subclass (or [Model subclass] for lists of them) always builds
+        nested records, other types are only applied when coerce is set.
+        :param key: key of the value in JSON objects, attribute name by default.
+        :param default: value used when the key is missing.
+        :param coerce: convert present, non-null values with kind.
+        :returns: None
+        """
+        self.kind = kind
+        self.key = key
+        self.default = default
+        self.coerce = coerce
+        self.name = None
+        self.order = next(_COUNTER)
+
+    def converter(self):
+        """
+        Build the function converting JSON values of this field.
+
+        :returns: callable or None if values are stored as they are.
+        """
+        if isinstance(self.kind, list):
+            item = self.kind[0].from_dict
+            return lambda value: [item(element) for element in value]
+        if isinstance(self.kind, type) and issubclass(self.kind, Model):
+            return self.kind.from_dict
+        if self.coerce:
+            return self.kind
+        return None
+
+
+class ModelCreator(type):
+    """
+    This metaclass turns Field declarations into __slots__ of the model.
+    """
+    def __new__(mcs, name, bases, attrs):
+        fields = []
+        for base in bases:
+            fields.extend(getattr(base, '_fields', ()))
+        declared = sorted(((key, item) for key, item in attrs.items() if isinstance(item, Field)),
+                          key=lambda pair: pair[1].order)
+        for key, item in declared:
+            del attrs[key]
+            item.name = key
+            item.key = item.key or key
+            fields.append(item)
+        attrs['__slots__'] = tuple(item.name for _, item in declared)
+        attrs['_fields'] = tuple(fields)
+        attrs['_decoders'] = tuple((item.name, item.key, item.default, item.converter()) for item in fields)
+        return super(ModelCreator, mcs).__new__(mcs, name, bases, attrs)
+
+
+class Model(with_metaclass(ModelCreator, object)):
+    """
+    A compact result record. Fields are declared with Field and stored in __slots__, so records take a fraction
+    of the memory dicts do. Unknown JSON keys are skipped.
+
+    Declared methods decode responses into models when given one:
+
+    >>> class Post(Model):
+    >>>     id = Field(int)
+    >>>     title = Field(str)
+    >>>
+    >>> class MyAPI(GenericAPI):
+    >>>     posts = APIMethod('get', 'posts/', model=Post)
+    """
+    __slots__ = ()
+    _fields = ()
+    _decoders = ()
+
+    def __init__(self, **kwargs):
+        """
+        :param kwargs: values of fields, missing ones get their defaults.
+        :returns: None
+        """
+        for field in self._fields:
+            setattr(self, field.name, kwargs.get(field.name, field.default))
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a record from a decoded JSON object.
+
+        :param data: dict.
+        :returns: model instance.
+        """
+        record = cls.__new__(cls)  # pylint: disable=no-value-for-parameter
+        for name, key, default, converter in cls._decoders:
+            value = data.get(key, _MISSING)
+            if value is _MISSING:
+                value = default
+            elif converter is not None and value is not None:
+                value = converter(value)
+            setattr(record, name, value)
+        return record
+
+    def to_dict(self):
+        """
+        :returns: dict of field values keyed by JSON keys.
+        """
+        return dict((field.key, getattr(self, field.name)) for field in self._fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, field.name) == getattr(other, field.name)
+                                                 for field in self._fields)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join('{}={!r}'.format(field.name, getattr(self, field.name))
+                                                              for field in self._fields))
+
+    def __getstate__(self):
+        return tuple(getattr(self, field.name) for field in self._fields)
+
+    def __setstate__(self, state):
+        for field, value in zip(self._fields, state):
+            setattr(self, field.name, value)
+
+
+def _skip_whitespace(content, index):
+    """
+    :param content: JSON document.
+    :param index: position in the document.
+    :returns: position of next non-whitespace character.
+    """
+    while index < len(content) and content[index] in _WHITESPACE:
+        index += 1
+    return index
+
+
+def decode(content, model):
+    """
+    Decode a JSON document into model records. A top-level array is decoded one element at a time,
+    so only a single intermediate dict is alive at once, not one per element.
+
+    :param content: JSON document.
+    :param model: Model subclass.
+    :returns: list of records for arrays, a single record for objects.
+    :raises ValueError: when the document isn't valid JSON, or isn't an object or an array of objects.
+    """
+    index = _skip_whitespace(content, 0)
+    if not content.startswith('[', index):
+        return model.from_dict(_check_object(json.loads(content), index))
+    from_dict = model.from_dict
+    records = []
+    index = _skip_whitespace(content, index + 1)
+    if content.startswith(']', index):
+        return _check_end(content, index, records)
+    while True:
+        element, end = _DECODER.raw_decode(content, index)
+        records.append(from_dict(_check_object(element, index)))
+        index = _skip_whitespace(content, end)
+        if content.startswith(']', index):
+            return _check_end(content, index, records)
+        if not content.startswith(',', index):
+            raise ValueError('Expecting , delimiter at position {}'.format(index))
+        index = _skip_whitespace(content, index + 1)
+
+
+def _check_object(element, index):
+    """
+    :param element: decoded JSON value.
+    :param index: position of the value in the document.
+    :returns: the value if it's an object.
+    :raises ValueError: when it isn't.
+    """
+    if not isinstance(element, dict):
+        raise ValueError('Expecting an object at position {}, got {}'.format(index, type(element).__name__))
+    return element
+
+
+def _check_end(content, index, records):
+    """
+    :param content: JSON document.
+    :param index: position of the closing bracket of the top-level array.
+    :param records: decoded records.
+    :returns: records if only whitespace follows the array.
+    :raises ValueError: when anything else does.
+    """
+    end = _skip_whitespace(content, index + 1)
+    if end != len(content):
+        raise ValueError('Extra data at position {}'.format(end))
+    return records
@@ -0,0 +1,488 @@
+"""
+.. module:: openapi
+    :platform: Unix, Windows
+    :synopsis: This module generates API classes from OpenAPI 3 documents. Compiled operation tables are cached
+     on disk, keyed by spec hash, and declared methods are created on first access.
+
+"""
+import errno
+import hashlib
+import json
+import keyword
+import os
+import re
+import stat
+
+import six
+
+from .api import ALLOWED_HTTP_METHODS, APIMethod, GenericAPI
+from .streaming import is_stream
+from .async_api import AsyncAPIBase
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover
+    yaml = None  # pylint: disable=invalid-name
+
+
+__all__ = ['OpenAPIMethod', 'generate_api', 'compile_spec']
+
+# Version of the compiled form, bump it whenever compile_spec output changes.
+COMPILER_VERSION = 2
+
+# Default directory for compiled specs, private to the user.
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                 'devourer')
+
+# Python types of JSON schema types checked in request bodies.
+JSON_TYPES = {
+    'object': (dict,),
+    'array': (list, tuple),
+    'string': six.string_types,
+    'integer': six.integer_types,
+    'number': six.integer_types + (float,),
+    'boolean': (bool,),
+}
+
+# Attribute names API classes use themselves, operations named like that get an underscore appended.
+RESERVED_NAMES = frozenset(dir(AsyncAPIBase))
+
+
+class OpenAPIMethod(APIMethod):
+    """
+    An APIMethod generated from an OpenAPI operation. Apart from the schema it knows operation's
+    query, header and cookie parameters and request body schema, and checks calls against them.
+    """
+    def __init__(self, http_method, schema, requests_kwargs=None,  # pylint: disable=too-many-arguments
+                 query_params=None, header_params=None, cookie_params=None, body_schema=None, summary=None):
+        """
+        This method initializes instance's properties.
+
+        :param http_method: HTTP method to call the API method with.
+        :param schema: Python 3-style format string containing relative method address with parameters.
+        :param requests_kwargs: any additional keyword arguments to be passed to requests call.
+        :param query_params: names of query string parameters declared by the operation.
+        :param header_params: names of header parameters declared by the operation.
+        :param cookie_params: names of cookie parameters declared by the operation.
+        :param body_schema: JSON schema of the request body, None if the operation doesn't take one.
+        :param summary: operation's summary.
+        :returns: None
+        """
+        super(OpenAPIMethod, self).__init__(http_method, schema, requests_kwargs=requests_kwargs)
+        self.query_params = query_params or []
+        self.header_params = header_params or []
+        self.cookie_params = cookie_params or []
+        self.body_schema = body_schema
+        self.summary = summary
+
+    def __call__(self, api, payload=None, data=None, headers=None, **kwargs):
+        """
+        This method checks the call against the operation and sends the request. Keyword arguments have to be
+        declared parameters - path and query ones are sent as usual, header and cookie ones as headers.
+        JSON payloads have to match the type and required properties of the body schema.
+
+        :param api: API instance making the call.
+        :param payload: the body to send along with the request as JSON.
+        :param data: dict or encoded string to be sent as request body.
+        :param headers: dict of headers to be send along with api call.
+        :param kwargs: parameters of the operation.
+        :returns: API request's result.
+        :raises TypeError: when the call has parameters the operation doesn't declare.
+        :raises ValueError: when the payload doesn't match the body schema.
+        """
+        declared = set(self.params) | set(self.query_params) | set(self.header_params) | set(self.cookie_params)
+        unknown = sorted(key for key in kwargs if key not in declared)
+        if unknown:
+            raise TypeError('{}() got undeclared parameters: {}'.format(self.name, ', '.join(unknown)))
+        if payload is not None and self.body_schema is not None and not is_stream(payload):
+            check_body(self.name, self.body_schema, payload)
+        sent = dict((key, str(kwargs.pop(key))) for key in self.header_params if key in kwargs)
+        cookies = ['{}={}'.format(key, kwargs.pop(key)) for key in self.cookie_params if key in kwargs]
+        if cookies:
+            sent['Cookie'] = '; '.join(cookies)
+        if sent:
+            headers = dict((api.headers if headers is None else headers) or {}, **sent)
+        return super(OpenAPIMethod, self).__call__(api, payload=payload, data=data, headers=headers, **kwargs)
+
+
+def check_body(name, schema, payload):
+    """
+    Check the type and required properties of a JSON payload, and types of its properties declaring one.
+
+    :param name: name of the method.
+    :param schema: JSON schema of the request body.
+    :param payload: the payload.
+    :returns: None
+    :raises ValueError: when the payload doesn't match the schema.
+    """
+    if not matches(schema, payload):
+        raise ValueError('Body of {} should be of type {}.'.format(name, schema['type']))
+    if not isinstance(payload, dict):
+        return
+    missing = [key for key in schema.get('required', []) if key not in payload]
+    if missing:
+        raise ValueError('Body of {} misses required properties: {}'.format(name, ', '.join(missing)))
+    for key, value in payload.items():
+        if not matches(schema.get('properties', {}).get(key) or {}, value):
+            raise ValueError('Property {} of {} body should be of type {}.'.format(key, name,
+                                                                                 schema['properties'][key]['type']))
+
+
+def matches(schema, value):
+    """
+    :param schema: JSON schema.
+    :param value: decoded JSON value.
+    :returns: whether the value is of the type the schema declares, if it declares a known one.
+    """
+    types = JSON_TYPES.get(schema.get('type'))
+    if types is None or (value is None and schema.get('nullable')):
+        return True
+    if isinstance(value, bool) and schema['type'] != 'boolean':
+        return False
+    return isinstance(value, types)
+
+
+class LazyMethods(dict):
+    """
+    Methods dictionary of a generated class. OpenAPIMethods are created from the operation table on first access.
+    Membership, length and iteration include operations which haven't been created yet, values() and items()
+    create all of them.
+    """
+    def __init__(self, operations, *args, **kwargs):
+        """
+        :param operations: compiled operations, as returned by compile_spec.
+        :returns: None
+        """
+        super(LazyMethods, self).__init__(*args, **kwargs)
+        self.operations = operations
+
+    def __missing__(self, key):
+        method = OpenAPIMethod(**self.operations[key])
+        method.name = key
+        self[key] = method
+        return method
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self.operations
+
+    def __iter__(self):
+        for key in self.operations:
+            yield key
+        for key in dict.__iter__(self):
+            if key not in self.operations:
+                yield key
+
+    def __len__(self):
+        return len(self.operations) + len([key for key in dict.__iter__(self) if key not in self.operations])
+
+    def keys(self):
+        """
+        :returns: list of names of all methods.
+        """
+        return list(self)
+
+    def values(self):
+        """
+        :returns: list of all methods, creating them if needed.
+        """
+        return [self[key] for key in self]
+
+    def items(self):
+        """
+        :returns: list of (name, method) pairs of all methods, creating them if needed.
+        """
+        return [(key, self[key]) for key in self]
+
+    def get(self, key, default=None):
+        """
+        Return method named key, creating it if needed.
+
+        :param key: name of the method.
+        :param default: value returned when there is no such method.
+        :returns: APIMethod instance or default.
+        """
+        return self[key] if key in self else default
+
+    def copy(self):
+        """
+        Copy the dictionary preserving its laziness.
+
+        :returns: LazyMethods instance.
+        """
+        return LazyMethods(self.operations, dict.items(self))
+
+
+class OpenAPIMixin(object):  # pylint: disable=too-few-public-methods
+    """
+    This mixin resolves generated operations and their hooks on first access. Resolved functions are kept
+    per class, so a subclass created after its parent has been used still gets its own hooks.
+    """
+    _operations = {}
+    default_url = None
+
+    def __init__(self, *args, **kwargs):
+        """
+        Use spec's server address unless another one is given.
+
+        :param url: API's base address, first server from the spec by default.
+        :param auth: authentication passed to requests.
+        :returns: None
+        """
+        args = list(args)
+        url = args.pop(0) if args else kwargs.pop('url', None)
+        auth = args.pop(0) if args else kwargs.pop('auth', None)
+        super(OpenAPIMixin, self).__init__(url or self.default_url, auth, *args, **kwargs)
+
+    @classmethod
+    def _resolve(cls, attr):
+        """
+        Find the function implementing an operation or its hook.
+
+        :param attr: name of the attribute.
+        :returns: function.
+        """
+        if attr in cls._operations:
+            call = getattr(cls, 'call_{}'.format(attr), None)
+            return six.get_unbound_function(call) if call else cls.outer_call(attr)
+        if attr.startswith('prepare_') and attr[len('prepare_'):] in cls._operations:
+            return six.get_unbound_function(cls.prepare)
+        if attr.startswith('finalize_') and attr[len('finalize_'):] in cls._operations:
+            return six.get_unbound_function(cls.finalize)
+        raise AttributeError("'{}' object has no attribute '{}'".format(cls.__name__, attr))
+
+    def __getattr__(self, attr):
+        cls = type(self)
+        resolved = cls.__dict__.get('_resolved')
+        if resolved is None:
+            resolved = {}
+            setattr(cls, '_resolved', resolved)
+        function = resolved.get(attr)
+        if function is None:
+            function = resolved.setdefault(attr, cls._resolve(attr))
+        return function.__get__(self, cls)
+
+
+def method_name(operation_id):
+    """
+    Turn an operationId (or any other string) into a snake_case identifier usable as method name.
+
+    :param operation_id: operationId of an OpenAPI operation.
+    :returns: method name.
+    """
+    name = re.sub(r'(?<=[a-z0-9])([A-Z])', r'_\1', operation_id)
+    name = re.sub(r'[^0-9a-zA-Z]+', '_', name).strip('_').lower()
+    if not name or name[0].isdigit():
+        name = '_' + name
+    if keyword.iskeyword(name) or name in RESERVED_NAMES:
+        name += '_'
+    return name
+
+
+def resolve(spec, item):
+    """
+    Follow local $ref pointers until a concrete object is reached.
+
+    :param spec: the whole OpenAPI document.
+    :param item: an object which may be a reference.
+    :returns: referenced object.
+    """
+    while isinstance(item, dict) and '$ref' in item:
+        reference = item['$ref']
+        if not reference.startswith('#/'):
+            raise ValueError('Only local references are supported: {}'.format(reference))
+        item = spec
+        for part in reference[2:].split('/'):
+            item = item[part.replace('~1', '/').replace('~0', '~')]
+    return item
+
+
+def compile_operation(spec, path, http_method, operation, shared_params):
+    """
+    Compile a single OpenAPI operation into OpenAPIMethod's keyword arguments.
+
+    :param spec: the whole OpenAPI document.
+    :param path: path the operation is declared under.
+    :param http_method: HTTP method of the operation.
+    :param operation: the operation object.
+    :param shared_params: parameters declared for all operations of the path.
+    :returns: keyword arguments for OpenAPIMethod.
+    """
+    params = {}
+    for param in shared_params + operation.get('parameters', []):
+        param = resolve(spec, param)
+        params[(param['name'], param.get('in'))] = param
+    body_schema = None
+    body = resolve(spec, operation.get('requestBody'))
+    if body:
+        content = body.get('content', {})
+        media = content.get('application/json') or next(iter(content.values()), {})
+        body_schema = resolve(spec, media.get('schema'))
+        if body_schema and 'properties' in body_schema:
+            body_schema = dict(body_schema, properties=dict(
+                (key, resolve(spec, value)) for key, value in body_schema['properties'].items()))
+    return {
+        'http_method': http_method,
+        'schema': path.lstrip('/'),
+        'query_params': sorted(name for name, location in params if location == 'query'),
+        'header_params': sorted(name for name, location in params if location == 'header'),
+        'cookie_params': sorted(name for name, location in params if location == 'cookie'),
+        'body_schema': body_schema,
+        'summary': operation.get('summary'),
+    }
+
+
+def compile_spec(spec):
+    """
+    Compile an OpenAPI 3 document into a JSON-serializable table of operations.
+
+    :param spec: parsed OpenAPI document.
+    :returns: dict with API title, base address and operations keyed by method name.
+    """
+    operations = {}
+    for path, item in sorted(spec.get('paths', {}).items()):
+        item = resolve(spec, item)
+        for http_method in ALLOWED_HTTP_METHODS:
+            if http_method not in item:
+                continue
+            operation = item[http_method]
+            name = method_name(operation.get('operationId') or '{}_{}'.format(http_method, path))
+            if name in operations:
+                raise ValueError('Duplicate operation name {} for {} {}'.format(name, http_method, path))
+            operations[name] = compile_operation(spec, path, http_method, operation, item.get('parameters', []))
+    url = ((spec.get('servers') or [{}])[0]).get('url')
+    if url and not url.endswith('/'):
+        url += '/'
+    return {'title': spec.get('info', {}).get('title'), 'url': url, 'operations': operations}
+
+
+def load_spec(path, content):
+    """
+    Parse an OpenAPI document, YAML documents require PyYAML.
+
+    :param path: path of the document.
+    :param content: raw content of the document.
+    :returns: parsed document.
+    """
+    if path.endswith(('.yaml', '.yml')):
+        if yaml is None:  # pragma: no cover
+            raise ImportError('PyYAML is required to read YAML OpenAPI documents.')
+        return yaml.safe_load(content)
+    return json.loads(content.decode('utf-8'))
+
+
+def trusted(stats):
+    """
+    Check if a cached file or its directory can be trusted - it belongs to the current user and nobody else
+    can write to it. Platforms without user ids (Windows) rely on the cache directory being private.
+
+    :param stats: os.stat_result of the file.
+    :returns: True if the file can be trusted.
+    """
+    if not hasattr(os, 'getuid'):  # pragma: no cover
+        return True
+    return stats.st_uid == os.getuid() and not stats.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def read_compiled(cache_path):
+    """
+    Read a compiled spec from cache, ignoring files planted by other users.
+
+    :param cache_path: path of the cached file.
+    :returns: compiled spec or None if it isn't cached or can't be trusted.
+    """
+    try:
+        if not trusted(os.stat(os.path.dirname(cache_path))):
+            return None
+        with open(cache_path) as cache_file:
+            if not trusted(os.fstat(cache_file.fileno())):
+                return None
+            return json.load(cache_file)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def write_compiled(cache_path, compiled):
+    """
+    Write a compiled spec to cache atomically, creating the cache directory accessible to the user only.
+
+    :param cache_path: path of the cached file.
+    :param compiled: compiled spec.
+    :returns: None
+    """
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, 0o700)
+    except OSError as error:
+        # Other workers starting at the same time may have created it.
+        if error.errno != errno.EEXIST:
+            raise
+    if not trusted(os.stat(cache_dir)):
+        return
+    temporary_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+    try:
+        descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except OSError:
+        # Left behind by a crashed process with the same id, the spec will be cached by another one.
+        return
+    with os.fdopen(descriptor, 'w') as cache_file:
+        json.dump(compiled, cache_file)
+    try:
+        getattr(os, 'replace', os.rename)(temporary_path, cache_path)
+    except OSError:
+        # Python 2 can't rename onto an existing file on Windows, another worker has written it already.
+        os.remove(temporary_path)
+
+
+def load_compiled(path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Return the compiled form of an OpenAPI document, from cache if it's there. Cached files which don't belong
+    to the current user, or which others can modify, are ignored and the cache isn't written to directories
+    like that.
+
+    :param path: path of the document.
+    :param cache_dir: directory of compiled specs cache, None disables caching.
+    :returns: compiled spec, as returned by compile_spec.
+    """
+    with open(path, 'rb') as spec_file:
+        content = spec_file.read()
+    if cache_dir is None:
+        return compile_spec(load_spec(path, content))
+    digest = hashlib.sha256(content + six.b(':{}'.format(COMPILER_VERSION))).hexdigest()
+    cache_path = os.path.join(cache_dir, '{}.json'.format(digest))
+    compiled = read_compiled(cache_path)
+    if compiled is None:
+        compiled = compile_spec(load_spec(path, content))
+        write_compiled(cache_path, compiled)
+    return compiled
+
+
+def generate_api(path, base=GenericAPI, name=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Generate an API class from an OpenAPI 3 document. Every operation becomes a declared method named after
+    its operationId in snake_case, taking operation's path, query, header and cookie parameters as keyword
+    arguments. Undeclared parameters and JSON payloads not matching the body schema are rejected.
+
+    Example:
+
+    >>> PetStoreAPI = generate_api('petstore.json', base=AsyncAPI)
+    >>> api = PetStoreAPI(auth=('user', 'password'), load_json=True)
+    >>> pet = api.show_pet_by_id(petId=1).result()
+
+    :param path: path of the OpenAPI document, JSON or YAML.
+    :param base: base class - GenericAPI, AsyncAPI or their subclass.
+    :param name: name of the class, derived from the API title by default.
+    :param cache_dir: directory of compiled specs cache, None disables caching.
+    :returns: API class.
+    """
+    compiled = load_compiled(path, cache_dir=cache_dir)
+    if name is None:
+        name = re.sub(r'[^0-9a-zA-Z]', '', (compiled['title'] or '').title()) or 'OpenAPI'
+    attrs = {
+        '_operations': compiled['operations'],
+        'default_url': compiled['url'],
+        '__doc__': compiled['title'],
+        '__module__': __name__,
+    }
+    model = type(base)(str(name), (OpenAPIMixin, base), attrs)
+    model._methods = LazyMethods(compiled['operations'], model._methods)  # pylint: disable=protected-access
+    return model
@@ -0,0 +1,362 @@
+"""
+.. module:: plan
+    :platform: Unix, Windows
+    :synopsis: This module runs graphs of dependent API calls, starting every call as soon as its inputs
+     are known instead of waiting for whole stages.
+
+"""
+import collections
+
+from concurrent.futures import ThreadPoolExecutor
+from six.moves import queue
+
+from .async_api import AsyncAPIBase
+
+
+__all__ = ['Plan']
+
+# Default maximum number of calls in flight.
+DEFAULT_CONCURRENCY = 8
+
+
+class Node(object):
+    """
+    A node of a plan - a call or a series of calls whose results other nodes may depend on.
+    """
+    def __init__(self, plan, name, args, kwargs):
+        """
+        :param plan: Plan the node belongs to.
+        :param name: name of the API method to call.
+        :param args: non-keyword arguments of the call.
+        :param kwargs: keyword arguments of the call.
+        :returns: None
+        """
+        self.plan = plan
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.dependents = []
+
+    @property
+    def dependencies(self):
+        """
+        Nodes whose results this node's arguments need.
+
+        :returns: list of Node instances.
+        """
+        dependencies = []
+        for value in list(self.args) + list(self.kwargs.values()):
+            node = value.node if isinstance(value, Derived) else value
+            if isinstance(node, Node) and node not in dependencies:
+                dependencies.append(node)
+        return dependencies
+
+    def __repr__(self):
+        return '<{} {}>'.format(type(self).__name__, self.name)
+
+
+class Call(Node):
+    """
+    A single call. Its arguments may be other calls (replaced by their results) or Derived values.
+    """
+    def map(self, function):
+        """
+        Derive an argument from the result of this call.
+
+        :param function: callable receiving the result.
+        :returns: Derived instance.
+        """
+        return Derived(self, function)
+
+
+class Each(Node):  # pylint: disable=too-few-public-methods
+    """
+    A call made for every item of the source - every element of a Call's result or every result of another Each.
+    Arguments which are callables receive the item, Call nodes and Derived values are resolved like in a Call,
+    the rest is passed as it is.
+    """
+    def __init__(self, plan, source, name, args, kwargs):  # pylint: disable=too-many-arguments
+        """
+        :param plan: Plan the node belongs to.
+        :param source: Call or Each node providing items.
+        :param name: name of the API method to call.
+        :param args: non-keyword arguments of the call.
+        :param kwargs: keyword arguments of the call.
+        :returns: None
+        """
+        super(Each, self).__init__(plan, name, args, kwargs)
+        self.source = source
+
+    @staticmethod
+    def arguments(item, args, kwargs):
+        """
+        Build call's arguments for an item.
+
+        :param item: an item of the source.
+        :param args: non-keyword arguments, with Call nodes and Derived values resolved.
+        :param kwargs: keyword arguments, with Call nodes and Derived values resolved.
+        :returns: tuple (args, kwargs).
+        """
+        args = tuple(value(item) if callable(value) else value for value in args)
+        kwargs = dict((key, value(item) if callable(value) else value) for key, value in kwargs.items())
+        return args, kwargs
+
+
+class Derived(object):  # pylint: disable=too-few-public-methods
+    """
+    A call argument computed from another call's result.
+    """
+    def __init__(self, node, function):
+        """
+        :param node: Call whose result is needed.
+        :param function: callable receiving the result.
+        :returns: None
+        """
+        self.node = node
+        self.function = function
+
+
+class Plan(object):
+    """
+    A graph of API calls whose arguments depend on other calls' results. Running it starts every call as soon as
+    its inputs are known, with a limit of calls in flight, so stages overlap instead of waiting for each other.
+    Identical calls (same method and arguments) are made once, and results are streamed as they come.
+
+    Example:
+
+    >>> plan = Plan(api, max_concurrency=16)
+    >>> posts = plan.call('posts')
+    >>> details = plan.each(posts, 'post', id=lambda post: post['id'])
+    >>> comments = plan.each(details, 'comments', id=lambda post: post['id'])
+    >>> first = plan.call('post', id=posts.map(lambda result: result[0]['id']))
+    >>> for node, result in plan.run(comments, first):
+    >>>     handle(node, result)
+    """
+    def __init__(self, api, max_concurrency=DEFAULT_CONCURRENCY):
+        """
+        :param api: GenericAPI or AsyncAPI instance. Calls of a GenericAPI are run in a thread pool.
+        :param max_concurrency: maximum number of calls in flight.
+        :returns: None
+        """
+        self.api = api
+        self.max_concurrency = max_concurrency
+        self.nodes = []
+
+    def call(self, name, *args, **kwargs):
+        """
+        Add a single call.
+
+        :param name: name of the API method.
+        :param args: non-keyword arguments, Call nodes and Derived values are resolved first.
+        :param kwargs: keyword arguments, Call nodes and Derived values are resolved first.
+        :returns: Call node.
+        """
+        return self.add(Call(self, name, args, kwargs))
+
+    def each(self, source, name, *args, **kwargs):
+        """
+        Add a call made for every item of the source.
+
+        :param source: Call (its result is iterated) or Each node (every its result is an item).
+        :param name: name of the API method.
+        :param args: non-keyword arguments, callables receive the item, Call nodes and Derived values are resolved.
+        :param kwargs: keyword arguments, callables receive the item, Call nodes and Derived values are resolved.
+        :returns: Each node.
+        """
+        if not isinstance(source, Node):
+            raise TypeError('Source of each() has to be a node of the plan.')
+        node = Each(self, source, name, args, kwargs)
+        source.dependents.append(node)
+        return self.add(node)
+
+    def add(self, node):
+        """
+        Add a node, registering it as a dependent of nodes its arguments need.
+
+        :param node: Call or Each node.
+        :returns: the node.
+        """
+        for dependency in node.dependencies:
+            if not isinstance(dependency, Call):
+                raise TypeError('Arguments can only depend on single calls, use each() for {!r}'.format(dependency))
+            if node not in dependency.dependents:
+                dependency.dependents.append(node)
+        self.nodes.append(node)
+        return node
+
+    def run(self, *outputs):
+        """
+        Run the plan.
+
+        :param outputs: nodes whose results should be streamed, nodes without dependents by default.
+        Only calls the outputs depend on are made.
+        :returns: generator of (node, result) pairs in order of completion, one per call of an Each node.
+        """
+        outputs = outputs or [node for node in self.nodes if not node.dependents]
+        return _Execution(self, outputs).run()
+
+
+class _Execution(object):  # pylint: disable=too-many-instance-attributes
+    """
+    State of a single run of a plan. Scheduling happens in the thread iterating results, workers only report
+    completed calls through a queue.
+    """
+    def __init__(self, plan, outputs):
+        """
+        :param plan: Plan to run.
+        :param outputs: nodes whose results are streamed.
+        :returns: None
+        """
+        self.plan = plan
+        self.outputs = set(outputs)
+        self.needed = self.ancestors(outputs)
+        self.values = {}
+        self.pending = dict((node, len(node.dependencies)) for node in self.needed)
+        self.deferred = collections.defaultdict(list)
+        self.results = {}
+        self.waiters = {}
+        self.ready = collections.deque()
+        self.resolved = collections.deque()
+        self.completions = queue.Queue()
+        self.in_flight = 0
+        self.executor = None
+
+    @staticmethod
+    def ancestors(outputs):
+        """
+        Find nodes the outputs need, including themselves.
+
+        :param outputs: nodes whose results are streamed.
+        :returns: set of nodes.
+        """
+        needed = set()
+        stack = list(outputs)
+        while stack:
+            node = stack.pop()
+            if node not in needed:
+                needed.add(node)
+                stack.extend(node.dependencies + ([node.source] if isinstance(node, Each) else []))
+        return needed
+
+    def run(self):
+        """
+        Schedule calls needed by the outputs until all are done.
+
+        :returns: generator of (node, result) pairs.
+        """
+        if not isinstance(self.plan.api, AsyncAPIBase):
+            self.executor = ThreadPoolExecutor(max_workers=self.plan.max_concurrency)
+        try:
+            for node, count in list(self.pending.items()):
+                if not count and isinstance(node, Call):
+                    self.request(node, *self.resolve(node))
+            while True:
+                while self.resolved:
+                    for output in self.complete(self.resolved.popleft()):
+                        yield output
+                while self.ready and self.in_flight < self.plan.max_concurrency:
+                    self.launch(*self.ready.popleft())
+                if not self.in_flight:
+                    break
+                key, future = self.completions.get()
+                self.in_flight -= 1
+                self.results[key] = future.result()
+                self.resolved.append(key)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False)
+
+    def resolve(self, node):
+        """
+        Replace Call nodes and Derived values among node's arguments with results.
+
+        :param node: Call or Each node.
+        :returns: tuple (args, kwargs).
+        """
+        def value(argument):
+            """
+            Resolve a single argument.
+            """
+            if isinstance(argument, Derived):
+                return argument.function(self.values[argument.node])
+            if isinstance(argument, Node):
+                return self.values[argument]
+            return argument
+
+        return (tuple(value(argument) for argument in node.args),
+                dict((key, value(argument)) for key, argument in node.kwargs.items()))
+
+    def request(self, node, args, kwargs):
+        """
+        Ask for a call whose result should be delivered to the node, reusing identical calls.
+
+        :param node: node waiting for the result.
+        :param args: non-keyword arguments of the call.
+        :param kwargs: keyword arguments of the call.
+        :returns: None
+        """
+        key = repr((node.name, args, sorted(kwargs.items())))
+        if key in self.waiters:
+            self.waiters[key].append(node)
+            return
+        self.waiters[key] = [node]
+        if key in self.results:
+            self.resolved.append(key)
+        else:
+            self.ready.append((key, node.name, args, kwargs))
+
+    def launch(self, key, name, args, kwargs):
+        """
+        Start a call, its future reports to the completions queue.
+
+        :param key: key identifying the call.
+        :param name: name of the API method.
+        :param args: non-keyword arguments of the call.
+        :param kwargs: keyword arguments of the call.
+        :returns: None
+        """
+        method = getattr(self.plan.api, name)
+        future = self.executor.submit(method, *args, **kwargs) if self.executor else method(*args, **kwargs)
+        self.in_flight += 1
+        future.add_done_callback(lambda done: self.completions.put((key, done)))
+
+    def complete(self, key):
+        """
+        Deliver a call's result to the nodes waiting for it.
+
+        :param key: key identifying the call.
+        :returns: list of (node, result) pairs to stream.
+        """
+        result = self.results[key]
+        outputs = []
+        for node in self.waiters.pop(key):
+            if node in self.outputs:
+                outputs.append((node, result))
+            if isinstance(node, Call):
+                self.values[node] = result
+            for dependent in node.dependents:
+                if dependent in self.needed:
+                    self.deliver(node, result, dependent)
+        return outputs
+
+    def deliver(self, node, result, dependent):
+        """
+        Pass a node's result to a dependent node, requesting dependent's calls whose inputs are all known.
+        Items of an Each node's source are held back until results of its other dependencies come.
+
+        :param node: node which got the result.
+        :param result: result of the call.
+        :param dependent: node depending on it.
+        :returns: None
+        """
+        if node in dependent.dependencies:
+            self.pending[dependent] -= 1
+        if isinstance(dependent, Each):
+            if dependent.source is node:
+                self.deferred[dependent].extend(result if isinstance(node, Call) else [result])
+            if not self.pending[dependent]:
+                args, kwargs = self.resolve(dependent)
+                for item in self.deferred.pop(dependent, []):
+                    self.request(dependent, *dependent.arguments(item, args, kwargs))
+        elif not self.pending[dependent]:
+            self.request(dependent, *self.resolve(dependent))
@@ -0,0 +1,143 @@
+"""
+.. module:: streaming
+    :platform: Unix, Windows
+    :synopsis: This module contains encoders producing request bodies chunk by chunk, so uploads take constant memory.
+
+"""
+import json
+import uuid
+
+import six
+
+
+__all__ = ['NDJSONStream', 'MultipartStream', 'is_stream']
+
+# Default size (bytes) of chunks produced by encoders.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def is_stream(payload):
+    """
+    Check whether a payload is an iterable which should be streamed, ie. a generator, rather than
+    a JSON document.
+
+    :param payload: payload passed to an API method.
+    :returns: True if payload should be streamed.
+    """
+    return hasattr(payload, '__iter__') and not isinstance(payload, (dict, list, tuple, six.string_types,
+                                                                     six.binary_type))
+
+
+def _encode(value):
+    """
+    Encode text as UTF-8, pass bytes through.
+
+    :param value: text or bytes.
+    :returns: bytes.
+    """
+    return value.encode('utf-8') if isinstance(value, six.text_type) else value
+
+
+class NDJSONStream(object):  # pylint: disable=too-few-public-methods
+    """
+    Request body encoding an iterable of JSON-serializable items as newline-delimited JSON, lazily.
+    Requests sends it with chunked transfer encoding. APIMethods wrap generators passed as `payload`
+    with it automatically.
+
+    Example:
+
+    >>> api.import_posts(data=NDJSONStream(post for post in read_posts()))
+    """
+    content_type = 'application/x-ndjson'
+
+    def __init__(self, items, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param items: iterable of JSON-serializable items.
+        :param chunk_size: minimum size (bytes) of produced chunks, except the last one.
+        :returns: None
+        """
+        self.items = items
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        lines = []
+        size = 0
+        for item in self.items:
+            line = (json.dumps(item, separators=(',', ':')) + '\n').encode('utf-8')
+            lines.append(line)
+            size += len(line)
+            if size >= self.chunk_size:
+                yield b''.join(lines)
+                lines = []
+                size = 0
+        if lines:
+            yield b''.join(lines)
+
+
+class MultipartStream(object):  # pylint: disable=too-few-public-methods
+    """
+    Request body encoding form fields and files as multipart/form-data, lazily. Files are read in chunks.
+
+    Fields are a dict or a list of (name, value) pairs. A value is text, bytes or a tuple
+    (filename, content) or (filename, content, content type), where content is text, bytes, a file object
+    or an iterable of chunks.
+
+    Example:
+
+    >>> with open('export.csv', 'rb') as export:
+    >>>     api.upload(data=MultipartStream({'kind': 'posts', 'file': ('export.csv', export, 'text/csv')}))
+    """
+    def __init__(self, fields, boundary=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param fields: dict or list of (name, value) pairs.
+        :param boundary: multipart boundary, random by default.
+        :param chunk_size: size (bytes) of chunks read from files.
+        :returns: None
+        """
+        self.fields = list(fields.items()) if isinstance(fields, dict) else fields
+        self.boundary = boundary or uuid.uuid4().hex
+        self.chunk_size = chunk_size
+
+    @property
+    def content_type(self):
+        """
+        Content type header of the body, including the boundary.
+
+        :returns: content type.
+        """
+        return 'multipart/form-data; boundary={}'.format(self.boundary)
+
+    def _content(self, content):
+        """
+        Produce chunks of a single part's content.
+
+        :param content: text, bytes, file object or iterable of chunks.
+        :returns: generator of bytes.
+        """
+        if isinstance(content, (six.text_type, six.binary_type)):
+            yield _encode(content)
+        elif hasattr(content, 'read'):
+            chunk = content.read(self.chunk_size)
+            while chunk:
+                yield _encode(chunk)
+                chunk = content.read(self.chunk_size)
+        else:
+            for chunk in content:
+                yield _encode(chunk)
+
+    def __iter__(self):
+        for name, value in self.fields:
+            disposition = 'form-data; name="{}"'.format(name)
+            content_type = None
+            if isinstance(value, tuple):
+                disposition += '; filename="{}"'.format(value[0])
+                content_type = value[2] if len(value) > 2 else 'application/octet-stream'
+                value = value[1]
+            head = '--{}\r\nContent-Disposition: {}\r\n'.format(self.boundary, disposition)
+            if content_type:
+                head += 'Content-Type: {}\r\n'.format(content_type)
+            yield _encode(head + '\r\n')
+            for chunk in self._content(value):
+                yield chunk
+            yield b'\r\n'
+        yield _encode('--{}--\r\n'.format(self.boundary))
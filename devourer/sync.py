@@ -0,0 +1,208 @@
+"""
+.. module:: sync
+    :platform: Unix, Windows
+    :synopsis: This module contains incremental synchronization of collection endpoints - polls using
+     conditional requests or a cursor, reporting only added, changed and removed items.
+
+"""
+import collections
+import hashlib
+import json
+import threading
+
+from .api import APIError
+from .models import Model
+
+
+__all__ = ['DeltaSync', 'Delta']
+
+
+class Delta(collections.namedtuple('Delta', ['added', 'changed', 'removed'])):
+    """
+    Changes found by a single poll: lists of added and changed items and keys of removed ones.
+    It's false when nothing changed.
+    """
+    __slots__ = ()
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    __nonzero__ = __bool__
+
+
+def _serialize(value):
+    """
+    Make models JSON-serializable for hashing.
+
+    :param value: value json can't serialize.
+    :returns: serializable representation.
+    """
+    if isinstance(value, Model):
+        return value.to_dict()
+    return repr(value)
+
+
+def digest(item):
+    """
+    Hash an item's content.
+
+    :param item: decoded item - dict, Model or any other JSON-serializable value.
+    :returns: digest bytes.
+    """
+    return hashlib.sha1(json.dumps(item, sort_keys=True, separators=(',', ':'),
+                                   default=_serialize).encode('utf-8')).digest()
+
+
+class DeltaSync(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Synchronizes a collection served by a declared method. Every poll goes through method's prepare and
+    finalize hooks, sends If-None-Match and If-Modified-Since headers with validators of the last response
+    and compares items with a per-item hash index, so an unchanged collection costs a single 304 response
+    and changed polls only report items which differ.
+
+    With `since` given, the cursor returned by the `cursor` function is sent as that parameter instead,
+    and responses are expected to contain only items changed since then. Removed items can be reported
+    by the server as tombstones, recognized by the `deleted` function.
+
+    Example:
+
+    >>> sync = DeltaSync(api, 'posts')
+    >>> for delta in sync.watch(interval=5):
+    >>>     handle(delta.added, delta.changed, delta.removed)
+
+    >>> sync = DeltaSync(api, 'posts', since='updated_since', cursor=lambda response, items: response.headers['X-Now'],
+    >>>                  deleted=lambda post: post.get('deleted', False))
+    """
+    def __init__(self, api, name, key='id', since=None,  # pylint: disable=too-many-arguments
+                 cursor=None, items=None, deleted=None, params=None):
+        """
+        :param api: API instance.
+        :param name: name of the declared method returning the collection.
+        :param key: name of the key (or attribute of models) identifying items, or a callable returning it.
+        :param since: name of the cursor parameter, None to poll the whole collection.
+        :param cursor: callable receiving the response and its items, returning the cursor for the next poll
+        (None keeps the current one). Required with `since`.
+        :param items: callable extracting the list of items from the decoded response, ie. from an envelope.
+        :param deleted: callable recognizing tombstones of removed items, used with `since`.
+        :param params: keyword arguments of every call.
+        :returns: None
+        """
+        if since is not None and cursor is None:
+            raise ValueError('Syncing with a since parameter requires a cursor function.')
+        self.api = api
+        self.name = name
+        self.key = key
+        self.since = since
+        self.cursor = cursor
+        self.items = items
+        self.deleted = deleted
+        self.params = params or {}
+        self.index = {}
+        self.position = None
+        self.etag = None
+        self.last_modified = None
+
+    def reset(self):
+        """
+        Forget the hash index, validators and cursor, so the next poll reports every item as added.
+
+        :returns: None
+        """
+        self.index = {}
+        self.position = None
+        self.etag = None
+        self.last_modified = None
+
+    def item_key(self, item):
+        """
+        :param item: decoded item.
+        :returns: key identifying the item.
+        """
+        if callable(self.key):
+            return self.key(item)
+        return item[self.key] if isinstance(item, dict) else getattr(item, self.key)
+
+    def request(self):
+        """
+        Make a conditional call of the method.
+
+        :returns: tuple (response, PrepareCallArgs).
+        """
+        kwargs = dict(self.params)
+        if self.since is not None and self.position is not None:
+            kwargs[self.since] = self.position
+        prepared = getattr(self.api, 'prepare_{}'.format(self.name))(self.name, **kwargs)
+        call_kwargs = dict(prepared.kwargs)
+        headers = dict(call_kwargs.pop('headers', None) or self.api.headers or {})
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return prepared.call(self.api, *prepared.args, headers=headers, **call_kwargs), prepared
+
+    def poll(self):
+        """
+        Fetch the collection and compare it with the previous poll.
+
+        :returns: Delta instance.
+        :raises APIError: when the server responds with an error.
+        """
+        response, prepared = self.request()
+        if response.status_code == 304:
+            return Delta([], [], [])
+        if response.status_code >= 400:
+            raise APIError('Error when syncing {}: {}'.format(self.name, response.status_code), response=response)
+        result = getattr(self.api, 'finalize_{}'.format(self.name))(self.name, response, *prepared.args,
+                                                                    **prepared.kwargs)
+        if isinstance(result, (bytes, bytearray)):
+            result = json.loads(result.decode('utf-8'))
+        items = self.items(result) if self.items is not None else result
+        delta = self.compare(items)
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        if self.cursor is not None:
+            position = self.cursor(response, items)
+            self.position = self.position if position is None else position
+        return delta
+
+    def compare(self, items):
+        """
+        Update the hash index with items.
+
+        :param items: list of decoded items.
+        :returns: Delta instance.
+        """
+        added, changed, removed = [], [], []
+        index = self.index if self.since is not None else {}
+        for item in items:
+            key = self.item_key(item)
+            if self.since is not None and self.deleted is not None and self.deleted(item):
+                if index.pop(key, None) is not None:
+                    removed.append(key)
+                continue
+            hashed = digest(item)
+            previous = self.index.get(key)
+            if previous is None:
+                added.append(item)
+            elif previous != hashed:
+                changed.append(item)
+            index[key] = hashed
+        if self.since is None:
+            removed = [key for key in self.index if key not in index]
+            self.index = index
+        return Delta(added, changed, removed)
+
+    def watch(self, interval, stop=None):
+        """
+        Poll the collection periodically.
+
+        :param interval: time (seconds) between polls.
+        :param stop: threading.Event ending the generator when set.
+        :returns: generator of non-empty Deltas.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            delta = self.poll()
+            if delta:
+                yield delta
+            stop.wait(interval)
@@ -0,0 +1,269 @@
+"""
+.. module:: testing
+    :platform: Unix, Windows
+    :synopsis: This module contains a local stand-in for http://jsonplaceholder.typicode.com/ used by tests,
+     benchmarks and load tests that shouldn't depend on a working internet connection.
+
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from email.utils import formatdate, parsedate_tz, mktime_tz
+
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.urllib.parse import parse_qs
+
+
+__all__ = ['StandInServer']
+
+# Number of posts served by the stand-in server.
+POSTS = 100
+
+# Number of comments served for every post.
+COMMENTS_PER_POST = 5
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    HTTP server handling every connection in its own thread.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+
+class _StandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Request handler serving a small, predictable subset of jsonplaceholder's API.
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    query = None
+    routes = [
+        ('GET', re.compile(r'^/posts/?$'), 'get_posts'),
+        ('GET', re.compile(r'^/posts/(\d+)/?$'), 'get_post'),
+        ('GET', re.compile(r'^/posts/(\d+)/comments/?$'), 'get_comments'),
+        ('GET', re.compile(r'^/login/?$'), 'login'),
+        ('POST', re.compile(r'^/posts/?$'), 'add_post'),
+        ('POST', re.compile(r'^/upload/?$'), 'upload'),
+    ]
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """
+        Keep the test output clean.
+        """
+
+    def dispatch(self, http_method):
+        """
+        Find the handler for request path and write its response.
+
+        :param http_method: HTTP method of the request.
+        :returns: None
+        """
+        self.server.stand_in.requests += 1
+        self.server.stand_in.last_headers = dict(self.headers.items())
+        path, _, query = self.path.partition('?')
+        self.query = parse_qs(query)
+        for method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if method == http_method and match:
+                response = getattr(self, handler)(*match.groups())
+                break
+        else:
+            response = 404, {}
+        status, body, headers = response if len(response) == 3 else response + ((),)
+        content = json.dumps(body).encode('utf-8')
+        if http_method == 'GET' and status == 200:
+            self.respond_conditionally(content, headers)
+        else:
+            self.respond(status, content, headers)
+
+    def respond(self, status, content, headers=()):
+        """
+        Write a JSON response keeping the connection alive.
+
+        :param status: HTTP status code.
+        :param content: encoded response body.
+        :param headers: additional (name, value) header pairs.
+        :returns: None
+        """
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def respond_conditionally(self, content, headers=()):
+        """
+        Write a response with ETag and Last-Modified (time the content was first served) headers,
+        or 304 Not Modified if the request's conditional headers match.
+
+        :param content: encoded response body.
+        :param headers: additional (name, value) header pairs.
+        :returns: None
+        """
+        etag = '"{}"'.format(hashlib.sha1(content).hexdigest())
+        modified = self.server.stand_in.versions.setdefault(etag, int(time.time()))
+        headers = [('ETag', etag), ('Last-Modified', formatdate(modified, usegmt=True))] + list(headers)
+        if 'If-None-Match' in self.headers:
+            fresh = etag in [tag.strip() for tag in self.headers['If-None-Match'].split(',')]
+        else:
+            since = parsedate_tz(self.headers.get('If-Modified-Since', ''))
+            fresh = since is not None and modified <= mktime_tz(since)
+        if fresh:
+            self.respond(304, b'', headers)
+        else:
+            self.respond(200, content, headers)
+
+    def read_body(self):
+        """
+        Read the request body.
+
+        :returns: request body as bytes.
+        """
+        if self.headers.get('Transfer-Encoding', '').lower() != 'chunked':
+            return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        chunks = []
+        size = int(self.rfile.readline().split(b';')[0], 16)
+        while size:
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+            size = int(self.rfile.readline().split(b';')[0], 16)
+        self.rfile.readline()
+        return b''.join(chunks)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Handle GET requests.
+        """
+        self.dispatch('GET')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """
+        Handle POST requests.
+        """
+        self.dispatch('POST')
+
+    def get_posts(self):
+        """
+        :returns: status and list of all posts, or of posts with ids greater than `since` query parameter.
+        """
+        if 'since' in self.query:
+            since = int(self.query['since'][0])
+            return 200, [post for post in self.server.stand_in.posts if post['id'] > since]
+        return 200, self.server.stand_in.posts
+
+    def get_post(self, post_id):
+        """
+        :param post_id: id of the post.
+        :returns: status and a single post.
+        """
+        for post in self.server.stand_in.posts:
+            if post['id'] == int(post_id):
+                return 200, post
+        return 404, {}
+
+    def get_comments(self, post_id):
+        """
+        :param post_id: id of the post.
+        :returns: status and comments of a single post.
+        """
+        return 200, self.server.stand_in.comments.get(int(post_id), [])
+
+    def login(self):
+        """
+        :returns: status, body and a header setting a session cookie bound to the request's Authorization header.
+        """
+        token = hashlib.sha1(self.headers.get('Authorization', '').encode('utf-8')).hexdigest()
+        return 200, {'session': token}, [('Set-Cookie', 'session={}; Path=/'.format(token))]
+
+    def add_post(self):
+        """
+        :returns: status and id of the post, which is never really stored.
+        """
+        self.read_body()
+        return 201, {'id': len(self.server.stand_in.posts) + 1}
+
+    def upload(self):
+        """
+        :returns: status and summary of the uploaded body.
+        """
+        body = self.read_body()
+        return 200, {'bytes': len(body), 'lines': body.count(b'\n'), 'content_type': self.headers.get('Content-Type'),
+                     'chunked': self.headers.get('Transfer-Encoding') == 'chunked'}
+
+
+class StandInServer(object):
+    """
+    A local HTTP server mimicking a part of http://jsonplaceholder.typicode.com/ API, running in a background thread.
+
+    Example:
+
+    >>> with StandInServer() as server:
+    >>>     api = TestApi(server.url, None, load_json=True)
+    >>>     posts = api.posts()
+    """
+    def __init__(self, host='127.0.0.1', port=0):
+        """
+        Prepare the data set and bind the server socket.
+
+        :param host: address to listen on.
+        :param port: port to listen on, 0 picks a free one.
+        :returns: None
+        """
+        self.posts = [{'userId': (i - 1) // 10 + 1, 'id': i, 'title': 'post {}'.format(i),
+                       'body': 'body of post {}'.format(i)} for i in range(1, POSTS + 1)]
+        self.comments = {
+            post['id']: [{'postId': post['id'], 'id': (post['id'] - 1) * COMMENTS_PER_POST + i,
+                          'name': 'comment {}'.format(i),
+                          'email': 'user{}@example.com'.format((post['id'] - 1) * COMMENTS_PER_POST + i),
+                          'body': 'body of comment {}'.format(i)} for i in range(1, COMMENTS_PER_POST + 1)]
+            for post in self.posts
+        }
+        self.requests = 0
+        self.last_headers = {}
+        self.versions = {}
+        self._server = _ThreadingHTTPServer((host, port), _StandInHandler)
+        self._server.stand_in = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        Base address of the server, ready to be used as API url.
+
+        :returns: base address of the server.
+        """
+        return 'http://{}:{}/'.format(*self._server.server_address[:2])
+
+    def start(self):
+        """
+        Start serving requests in a daemon thread.
+
+        :returns: self
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving requests and close the socket.
+
+        :returns: None
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,15 @@
+"""
+This package contains tests for generic_api package, one module per feature. Run them with
+`python -m devourer.tests`.
+"""
+from .test_adapters import WarmupTest
+from .test_api import GenericAPICreatorTest, APIMethodTest, GenericAPITest, TenantAPITest
+from .test_async_api import AsyncAPITest, GeventAsyncAPITest, PriorityExecutorTest, CompletionTest
+from .test_cache import SQLiteCacheTest
+from .test_loadtest import LoadTestTest
+from .test_models import ModelTest
+from .test_openapi import OpenAPITest
+from .test_plan import PlanTest
+from .test_streaming import StreamingTest
+from .test_sync import DeltaSyncTest
+from .test_tracing import TracingTest
@@ -0,0 +1,8 @@
+"""
+This module runs all tests of generic_api package.
+"""
+import unittest
+
+
+if __name__ == '__main__':
+    unittest.main(module='devourer.tests')
@@ -0,0 +1,83 @@
+"""
+This module contains tests for connection warmup and DNS caching.
+"""
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+from six.moves.urllib.parse import urlparse
+import requests
+
+from .. import GenericAPI, APIMethod, SharedSession
+from ..adapters import DNS_CACHE, DNSCache
+from ..testing import StandInServer
+from ..tracing import Tracer
+
+
+class WarmupTest(unittest.TestCase):
+    """
+    This suite tests connection pre-warming and DNS caching.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        This method creates the API class.
+        :return:
+        """
+        class TestAPI(GenericAPI):
+            """
+            API for warmup tests.
+            """
+            post = APIMethod('get', 'posts/{id}/')
+
+        cls.TestAPI = TestAPI
+
+    def tearDown(self):
+        """
+        This method drops addresses cached by the tests from the process-wide DNS cache.
+        :return:
+        """
+        DNS_CACHE.clear()
+
+    def test_warmup(self):
+        """
+        This test checks if calls after warmup reuse pre-opened connections.
+        :return:
+        """
+        with StandInServer() as server:
+            url = server.url.replace('127.0.0.1', 'localhost')
+            warm = self.TestAPI(url, None, session=SharedSession(pool_size=4), tracer=Tracer())
+            self.assertEqual(warm.warmup(), 4)
+            self.assertIn(('localhost', urlparse(url).port), DNS_CACHE)
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda post_id: warm.post(id=post_id), range(1, 5)))
+            self.assertEqual([span.phases.get('connect') for span in warm.tracer.exporter.spans], [None] * 4)
+            self.assertEqual(warm.warmup(2), 2)
+            cold = self.TestAPI(url, None, session=SharedSession(pool_size=4), tracer=Tracer())
+            cold.post(id=1)
+            self.assertIn('connect', cold.tracer.exporter.spans[-1].phases)
+            self.assertEqual(server.requests, 5)
+
+    def test_dns_cache(self):
+        """
+        This test checks caching and invalidation of resolved addresses.
+        :return:
+        """
+        cache = DNSCache(ttl=60)
+        addresses = cache.resolve('localhost', 80)
+        self.assertTrue(set(addresses) & {'127.0.0.1', '::1'})
+        self.assertIs(cache.resolve('localhost', 80), addresses)
+        self.assertIn(('localhost', 80), cache)
+        cache.invalidate('localhost', 80)
+        self.assertNotIn(('localhost', 80), cache)
+        self.assertIsNot(cache.resolve('localhost', 80), addresses)
+        cache.clear()
+        uncached = DNSCache(ttl=0)
+        uncached.resolve('localhost', 80)
+        self.assertNotIn(('localhost', 80), uncached)
+
+        server = StandInServer().start()
+        url = server.url.replace('127.0.0.1', 'localhost')
+        server.stop()
+        api = self.TestAPI(url, None, session=SharedSession())
+        self.assertRaises(requests.ConnectionError, api.post, id=1)
+        self.assertNotIn(('localhost', urlparse(url).port), DNS_CACHE)
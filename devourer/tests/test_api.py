@@ -0,0 +1,249 @@
+"""
+This module contains tests for declarative APIs and instances sharing sessions.
+"""
+import base64
+import threading
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .. import GenericAPI, AsyncAPI, APIMethod, APIError, GenericAPICreator, SharedSession
+from ..async_api import DEFAULT_SHARED_EXECUTORS, default_executor
+from ..testing import StandInServer
+from ..tracing import Tracer
+
+
+class GenericAPICreatorTest(unittest.TestCase):
+    """
+    Test API metaclass.
+    """
+    def test_bases(self):
+        """
+        Check if only proper bases will be modified.
+        :return:
+        """
+        self.assertRaises(AttributeError, lambda: GenericAPICreator('test', (object, ), {}))
+
+    def test_inherited_call(self):
+        """
+        Check if subclasses can override calls of inherited methods.
+        :return:
+        """
+        class ParentAPI(GenericAPI):
+            """
+            API declaring a method.
+            """
+            posts = APIMethod('get', 'posts/')
+
+        class ChildAPI(ParentAPI):
+            """
+            API overriding the call.
+            """
+            def call_posts(self, *args, **kwargs):
+                """
+                Mark the result of the call.
+                """
+                return 'overridden', self.call('posts', *args, **kwargs)
+
+        with StandInServer() as server:
+            self.assertEqual(ChildAPI(server.url, None, load_json=True).posts()[0], 'overridden')
+        self.assertFalse(hasattr(ChildAPI, 'call_posts'))
+
+    def test_instance_settings_names(self):
+        """
+        Check if methods can be declared with names of instance's settings.
+        :return:
+        """
+        class TestAPI(GenericAPI):
+            """
+            API declaring methods named like settings.
+            """
+            session = APIMethod('post', 'posts/')
+            tracer = APIMethod('get', 'posts/{id}/')
+
+        tracer = Tracer()
+        with StandInServer() as server:
+            api = TestAPI(server.url, None, load_json=True, session=SharedSession(), tracer=tracer)
+            self.assertEqual(api.session(payload={'title': 'new'})['id'], 101)  # pylint: disable=not-callable
+            self.assertEqual(api.tracer(id=2)['id'], 2)  # pylint: disable=not-callable
+        self.assertEqual([span.name for span in tracer.exporter.spans], ['session', 'tracer'])
+        plain = GenericAPI('http://localhost/', None, tracer=tracer)
+        self.assertIs(plain.tracer, tracer)
+        self.assertIsNone(plain.session)
+
+
+class APIMethodTest(unittest.TestCase):
+    """
+    This suite tests APIMethod correctness.
+    """
+    def test_schema(self):
+        """
+        This test checks whether URL schema is parsed correctly into parameters.
+        :return:
+        """
+        method = APIMethod('get', 'a/b')
+        self.assertEqual(method.http_method, 'get')
+        self.assertFalse(method.params)
+        method = APIMethod('get', 'a/{b}')
+        self.assertEqual(method.params, ['b'])
+        self.assertRaises(ValueError, APIMethod, 'nonexistant', 'foo')
+
+
+class GenericAPITest(unittest.TestCase):
+    """
+    This test suite test correctness of GenericAPI. Figures.
+    Oh, you need a working internet connection to run these tests.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        This method creates resources needed to test GenericAPI.
+        :return:
+        """
+        class TestAPI(GenericAPI):
+            """
+            This class uses http://jsonplaceholder.typicode.com/ as API with
+            known data to enable full testing without mocking.
+            :return:
+            """
+            posts = APIMethod('get', 'posts/')
+            comments = APIMethod('get', 'posts/{id}/comments')
+            false = APIMethod('get', 'error')
+
+            def call_posts(self, *args, **kwargs):
+                """
+                This method calls posts API method.
+                :param args:
+                :param kwargs:
+                :return: result of finalize_posts.
+                """
+                prepared = self.prepare('posts', *args, **kwargs)
+                result = prepared.call(self, *args, **kwargs)
+                return self.finalize('posts', result, *args, **kwargs)
+
+        cls.TestAPI = TestAPI
+        cls.api = TestAPI('http://jsonplaceholder.typicode.com/', None, load_json=True)
+
+    def test_creation(self):
+        """
+        This tests checks if the class is correctly created and initialized.
+        :return:
+        """
+        self.assertTrue(hasattr(self.api, 'posts'))
+        self.assertTrue(hasattr(self.api, 'comments'))
+        self.assertTrue(hasattr(self.api, 'finalize_posts'))
+        self.assertTrue(hasattr(self.api, 'finalize_comments'))
+        self.assertIsInstance(self.api.prepare('posts').call, APIMethod)
+        self.assertFalse(hasattr(self.api.prepare('posts').call, 'api'))
+
+    def test_calls(self):
+        """
+        This test checks if successful calls return corect results.
+        :return:
+        """
+        self.assertEqual(self.api.posts()[1]['id'], 2)
+        self.assertEqual(self.api.comments(id=2)[0]['email'], 'Presley.Mueller@myrl.com')
+
+    def test_exceptions(self):
+        """
+        This test call if exceptions are raised correctly.
+        :return:
+        """
+        api = self.TestAPI('http://www.pb.pl/nonexistent', None, load_json=True, throw_on_error=True)
+        self.assertRaises(APIError, api.posts)
+
+    def test_without_json_loads(self):
+        """
+        This test checks if API works without JSON loading. As if you will ever need it.
+        :return:
+        """
+        api = self.TestAPI('http://jsonplaceholder.typicode.com/', None, load_json=False)
+        self.assertNotEqual(api.comments(id=2).find(b'Presley.Mueller@myrl.com'), -1)
+
+
+def basic_auth(username, password):
+    """
+    Build the Authorization header value of HTTP Basic credentials.
+
+    :param username: user name.
+    :param password: password.
+    :returns: header value.
+    """
+    return 'Basic {}'.format(base64.b64encode('{}:{}'.format(username, password).encode('utf-8')).decode('ascii'))
+
+
+class TenantAPITest(unittest.TestCase):
+    """
+    This suite tests many API instances sharing a session and an executor.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        This method starts two local stand-in servers.
+        :return:
+        """
+        cls.servers = [StandInServer().start(), StandInServer().start()]
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        This method stops the stand-in servers.
+        :return:
+        """
+        for server in cls.servers:
+            server.stop()
+
+    def test_isolation(self):
+        """
+        This test checks if instances sharing a session send only their own credentials and headers,
+        and never replay cookies set for another tenant.
+        :return:
+        """
+        class TestAPI(GenericAPI):
+            """
+            A tiny API declaration.
+            """
+            login = APIMethod('get', 'login/')
+            post = APIMethod('get', 'posts/{id}/')
+
+        session = SharedSession(pool_size=2)
+        first, second = [TestAPI(server.url, (tenant, 'secret'), load_json=True, session=session,
+                                 headers={'X-Tenant': tenant})
+                         for server, tenant in zip(self.servers, ('first', 'second'))]
+        self.servers[1].posts[0] = dict(self.servers[1].posts[0], title='changed')
+        for api, server, tenant in ((first, self.servers[0], 'first'), (second, self.servers[1], 'second')):
+            self.assertTrue(api.login()['session'])
+            self.assertEqual(server.last_headers['Authorization'], basic_auth(tenant, 'secret'))
+            self.assertEqual(server.last_headers['X-Tenant'], tenant)
+        self.assertEqual(first.post(id=1)['title'], 'post 1')
+        self.assertEqual(self.servers[0].last_headers['X-Tenant'], 'first')
+        self.assertEqual(second.post(id=1)['title'], 'changed')
+        self.assertEqual(self.servers[1].last_headers['Authorization'], basic_auth('second', 'secret'))
+        self.assertEqual(self.servers[1].last_headers['X-Tenant'], 'second')
+        self.assertNotIn('Cookie', self.servers[0].last_headers)
+        self.assertNotIn('Cookie', self.servers[1].last_headers)
+        self.assertEqual(len(session.cookies), 0)
+
+    def test_shared_executor(self):
+        """
+        This test checks if async instances can share one executor, and share the default one without
+        executor settings.
+        :return:
+        """
+        class TestAPI(AsyncAPI):
+            """
+            A tiny API declaration.
+            """
+            post = APIMethod('get', 'posts/{id}/')
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        apis = [TestAPI(server.url, None, load_json=True, executor=executor) for server in self.servers]
+        self.assertEqual([api.post(id=2).result()['id'] for api in apis], [2, 2])
+        executor.shutdown()
+
+        self.assertIs(default_executor(), default_executor())
+        default_executor().submit(int).result()
+        threads = threading.active_count()
+        apis = [TestAPI(self.servers[0].url, None, load_json=True) for _ in range(50)]
+        self.assertEqual([api.post(id=3).result()['id'] for api in apis], [3] * 50)
+        self.assertLessEqual(threading.active_count() - threads, DEFAULT_SHARED_EXECUTORS)
@@ -0,0 +1,381 @@
+"""
+This module contains tests for async APIs, executors and completion of async calls.
+"""
+import threading
+import unittest
+import warnings
+from functools import partial
+
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+from .. import AsyncAPI, APIMethod, APIError, Bulkhead
+from ..completion import CompletionQueue, as_completed
+from ..executors import GeventExecutor, PriorityExecutor, Pool
+from ..testing import StandInServer
+
+
+class AsyncAPITest(unittest.TestCase):
+    """
+    This test suite test correctness of AsyncAPI. Figures.
+    Oh, you need a working internet connection to run these tests.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        This method creates resources needed to test GenericAPI.
+        :return:
+        """
+        class TestAPI(AsyncAPI):
+            """
+            This class uses http://jsonplaceholder.typicode.com/ as API with
+            known data to enable full testing without mocking.
+            :return:
+            """
+            posts = APIMethod('get', 'posts/')
+            comments = APIMethod('get', 'posts/{id}/comments')
+            false = APIMethod('get', 'error')
+
+        cls.TestAPI = TestAPI
+        cls.api = TestAPI('http://jsonplaceholder.typicode.com/', None, load_json=True)
+        cls.executor_api = TestAPI('http://jsonplaceholder.typicode.com/', None, load_json=True,
+                                   executor=ThreadPoolExecutor(max_workers=1))
+
+    def test_async_calls(self):
+        """
+        This test checks async calls
+        :return:
+        """
+        self.assertIsInstance(self.api.posts(), Future)
+        self.assertEqual(self.api.posts().result()[1]['id'], 2)
+        self.assertEqual(self.executor_api.comments(id=2).result()[0]['email'], 'Presley.Mueller@myrl.com')
+        self.assertEqual(self.executor_api.false(id=1).result(), {})
+
+
+@unittest.skipIf(Pool is None, 'gevent is not installed')
+class GeventAsyncAPITest(AsyncAPITest):
+    """
+    This test suite runs AsyncAPI tests with the greenlet executor.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        This method creates resources needed to test AsyncAPI with GeventExecutor.
+        :return:
+        """
+        super(GeventAsyncAPITest, cls).setUpClass()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            cls.api = cls.TestAPI('http://jsonplaceholder.typicode.com/', None, load_json=True,
+                                  executor_class=GeventExecutor, executors=10)
+            cls.executor_api = cls.TestAPI('http://jsonplaceholder.typicode.com/', None, load_json=True,
+                                           executor=GeventExecutor(max_workers=1))
+
+    def test_local_calls(self):
+        """
+        This test checks greenlet futures against the stand-in server.
+        :return:
+        """
+        with StandInServer() as server, warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            executor = GeventExecutor(max_workers=4)
+            api = self.TestAPI(server.url, None, load_json=True, throw_on_error=True, executor=executor)
+            futures = [api.comments(id=post_id) for post_id in range(1, 21)]
+            self.assertEqual([future.result()[0]['postId'] for future in futures], list(range(1, 21)))
+            self.assertIsInstance(api.false().exception(), APIError)
+            executor.shutdown()
+            self.assertRaises(RuntimeError, executor.submit, len, [])
+
+    def test_cancel_futures(self):
+        """
+        This test checks if shutdown can cancel calls which haven't started.
+        :return:
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            executor = GeventExecutor(max_workers=5)
+        # Greenlets don't start before the hub gets control.
+        futures = [executor.submit(len, [i]) for i in range(3)]
+        executor.shutdown(cancel_futures=True)
+        self.assertTrue(all(future.cancelled() for future in futures))
+
+
+class PriorityExecutorTest(unittest.TestCase):
+    """
+    This suite tests priority scheduling and bulkheads.
+    """
+    def test_priorities(self):
+        """
+        This test checks if queued calls are served by priority.
+        :return:
+        """
+        executor = PriorityExecutor(max_workers=1)
+        started = threading.Event()
+        release = threading.Event()
+        order = []
+        executor.schedule(lambda: started.set() or release.wait())
+        started.wait()
+        futures = [executor.schedule(partial(order.append, priority), priority=priority) for priority in (5, 1, 3)]
+        futures.append(executor.submit(order.append, 10))
+        self.assertEqual(executor.pending(), 4)
+        release.set()
+        for future in futures:
+            future.result()
+        self.assertEqual(order, [1, 3, 5, 10])
+        self.assertEqual(sorted(executor.queue_wait_stats()), [1, 3, 5, 10])
+        self.assertEqual(executor.queue_wait_stats()[1]['count'], 1)
+        self.assertIsInstance(executor.schedule(lambda: 1 / 0).exception(), ZeroDivisionError)
+        executor.shutdown()
+        self.assertRaises(RuntimeError, executor.submit, len, [])
+
+    def test_idle_burst(self):
+        """
+        This test checks if a burst of calls after the pool went idle runs on as many threads as it needs.
+        :return:
+        """
+        executor = PriorityExecutor(max_workers=8)
+        executor.submit(int).result()
+        threading.Event().wait(0.1)
+        lock = threading.Lock()
+        running = []
+        everyone = threading.Event()
+
+        def call():
+            """
+            Wait until all calls of the burst run at once.
+            """
+            with lock:
+                running.append(None)
+                if len(running) == 8:
+                    everyone.set()
+            return everyone.wait(1)
+
+        futures = [executor.submit(call) for _ in range(8)]
+        self.assertTrue(all(future.result() for future in futures))
+        executor.shutdown()
+
+    def test_bulkheads(self):
+        """
+        This test checks if bulkheads limit concurrency of their groups only.
+        :return:
+        """
+        executor = PriorityExecutor(max_workers=4, bulkheads={'export': 1})
+        lock = threading.Lock()
+        running = {'now': 0, 'max': 0}
+        release = threading.Event()
+
+        def export():
+            """
+            Slow call counting concurrent exports.
+            """
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+            release.wait()
+            with lock:
+                running['now'] -= 1
+
+        exports = [executor.schedule(export, priority=0, group='export') for _ in range(3)]
+        self.assertEqual(executor.schedule(lambda: 'fast', priority=10).result(timeout=5), 'fast')
+        release.set()
+        for future in exports:
+            future.result()
+        self.assertEqual(running['max'], 1)
+        executor.shutdown()
+
+    def test_async_api(self):
+        """
+        This test checks if AsyncAPI passes method's priority and bulkhead to the executor.
+        :return:
+        """
+        class TestAPI(AsyncAPI):
+            """
+            API with prioritized methods.
+            """
+            posts = APIMethod('get', 'posts/', priority=100, bulkhead='bulk')
+            post = APIMethod('get', 'posts/{id}/', priority=0)
+
+        with StandInServer() as server:
+            executor = PriorityExecutor(max_workers=2, bulkheads={'bulk': 1})
+            api = TestAPI(server.url, None, load_json=True, executor=executor)
+            futures = [api.posts(), api.post(id=1), api.post(id=2, _priority=50)]
+            self.assertEqual([len(futures[0].result()), futures[1].result()['id'], futures[2].result()['id']],
+                             [100, 1, 2])
+            self.assertEqual(sorted(executor.queue_wait_stats()), [0, 50, 100])
+            executor.shutdown()
+
+    def test_declared_bulkheads(self):
+        """
+        This test checks limits declared by methods and warnings about groups without a limit.
+        :return:
+        """
+        class TestAPI(AsyncAPI):
+            """
+            API with bulkheads.
+            """
+            posts = APIMethod('get', 'posts/', bulkhead=Bulkhead('bulk', 1))
+            comments = APIMethod('get', 'posts/{id}/comments', bulkhead='unknown')
+
+        with StandInServer() as server:
+            executor = PriorityExecutor(max_workers=2)
+            api = TestAPI(server.url, None, load_json=True, executor=executor)
+            self.assertEqual(len(api.posts().result()), 100)
+            self.assertEqual(executor.bulkheads, {'bulk': 1})
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                self.assertEqual(len(api.comments(id=1).result()), 5)
+            self.assertIn('unknown', str(caught[0].message))
+            executor.shutdown()
+
+    def test_cancel_futures(self):
+        """
+        This test checks if shutdown can cancel queued and parked calls.
+        :return:
+        """
+        executor = PriorityExecutor(max_workers=1, bulkheads={'bulk': 1})
+        started = threading.Event()
+        release = threading.Event()
+        running = executor.schedule(lambda: started.set() or release.wait(), group='bulk')
+        started.wait()
+        queued = [executor.schedule(len, group='bulk'), executor.submit(len, [])]
+        executor.shutdown(wait=False, cancel_futures=True)
+        release.set()
+        self.assertTrue(running.result())
+        self.assertTrue(all(future.cancelled() for future in queued))
+        self.assertEqual(executor.pending(), 0)
+
+
+class CompletionTest(unittest.TestCase):
+    """
+    This suite tests completion callbacks and queues of async calls.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        This method creates the API class.
+        :return:
+        """
+        class TestAPI(AsyncAPI):
+            """
+            Async API with a slow method.
+            """
+            post = APIMethod('get', 'posts/{id}/')
+            slow = APIMethod('get', 'posts/{id}/')
+
+            def finalize_slow(self, name, result, *args, **kwargs):
+                """
+                Take a while to finalize.
+                """
+                threading.Event().wait(0.3)
+                return self.finalize(name, result, *args, **kwargs)
+
+        cls.TestAPI = TestAPI
+
+    def test_callbacks(self):
+        """
+        This test checks success and error callbacks.
+        :return:
+        """
+        results, errors = [], []
+        with StandInServer() as server:
+            api = self.TestAPI(server.url, None, load_json=True, throw_on_error=True)
+            futures = [api.post(id=1, _on_success=results.append, _on_error=errors.append),
+                       api.post(id=1000, _on_success=results.append, _on_error=errors.append),
+                       api.post(id=2, _on_error=errors.append)]
+            list(api.as_completed(futures))
+        self.assertEqual(results, [server.posts[0]])
+        self.assertEqual([type(error) for error in errors], [APIError])
+
+    def test_as_completed(self):
+        """
+        This test checks if fast calls are handled before slow ones submitted earlier.
+        :return:
+        """
+        with StandInServer() as server:
+            api = self.TestAPI(server.url, None, load_json=True, executors=4)
+            slow = api.slow(id=1)
+            fast = [api.post(id=post_id) for post_id in range(2, 5)]
+            done = list(api.as_completed())
+            self.assertEqual(set(done[:3]), set(fast))
+            self.assertIs(done[3], slow)
+            self.assertEqual(list(api.as_completed()), [])
+            self.assertEqual(list(api.as_completed([slow, slow])), [slow])
+            self.assertRaises(FuturesTimeoutError, list, as_completed([Future()], timeout=0.1))
+
+    def test_queue(self):
+        """
+        This test checks draining a bounded completion queue from several threads.
+        :return:
+        """
+        with StandInServer() as server:
+            api = self.TestAPI(server.url, None, load_json=True, executors=8)
+            completions = CompletionQueue(maxsize=5)
+            handled = [[] for _ in range(3)]
+
+            def consume(results):
+                """
+                Drain the queue.
+                """
+                for future in completions:
+                    results.append(future.result()['id'])
+
+            consumers = [threading.Thread(target=consume, args=(results,)) for results in handled]
+            for consumer in consumers:
+                consumer.start()
+            for post_id in range(1, 51):
+                completions.add(api.post(id=post_id))
+            completions.close()
+            for consumer in consumers:
+                consumer.join(5)
+            self.assertFalse(any(consumer.is_alive() for consumer in consumers))
+            self.assertEqual(sorted(sum(handled, [])), list(range(1, 51)))
+            self.assertEqual(len(completions), 0)
+            self.assertIsNone(completions.get())
+            self.assertRaises(ValueError, completions.add, Future())
+
+    def test_completed_futures(self):
+        """
+        This test checks if adding more completed futures than a bounded queue holds waits for consumers.
+        :return:
+        """
+        completions = CompletionQueue(maxsize=2)
+        futures = [Future() for _ in range(10)]
+        for index, future in enumerate(futures):
+            future.set_result(index)
+
+        def produce():
+            """
+            Add every future and close the queue.
+            """
+            for future in futures:
+                completions.add(future)
+            completions.close()
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        producer.join(0.2)
+        self.assertTrue(producer.is_alive())
+        self.assertEqual(len(completions), 2)
+        self.assertEqual([future.result() for future in completions], list(range(10)))
+        producer.join(5)
+        self.assertFalse(producer.is_alive())
+
+    @unittest.skipIf(Pool is None, 'gevent is not installed')
+    def test_gevent(self):
+        """
+        This test checks iterating over futures of GeventExecutor in order of completion.
+        :return:
+        """
+        with StandInServer() as server, warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            api = self.TestAPI(server.url, None, load_json=True, executor=GeventExecutor(max_workers=10))
+            futures = [api.post(id=post_id) for post_id in range(1, 6)]
+            done = list(api.as_completed(timeout=5))
+            self.assertEqual(set(done), set(futures))
+            self.assertEqual(sorted(future.result()['id'] for future in done), list(range(1, 6)))
+            completions = CompletionQueue()
+            for post_id in range(6, 9):
+                completions.add(api.post(id=post_id))
+            completions.close()
+            self.assertEqual(sorted(future.result()['id'] for future in completions), [6, 7, 8])
@@ -0,0 +1,110 @@
+"""
+This module contains tests for the shared response cache.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from .. import GenericAPI, APIMethod, APIError
+from ..cache import SQLiteCache
+from ..testing import StandInServer
+
+
+class SQLiteCacheTest(unittest.TestCase):
+    """
+    This suite tests the cross-process response cache.
+    """
+    def setUp(self):
+        """
+        This method starts a stand-in server and prepares a cached API.
+        :return:
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+        self.server = StandInServer().start()
+        self.cache = SQLiteCache(self.path, ttl=60)
+
+        class TestAPI(GenericAPI):
+            """
+            API with cached methods.
+            """
+            posts = APIMethod('get', 'posts/', cache=self.cache)
+            post = APIMethod('get', 'posts/{id}/', cache=self.cache)
+
+        self.TestAPI = TestAPI  # pylint: disable=invalid-name
+        self.api = TestAPI(self.server.url, None, load_json=True, throw_on_error=True)
+
+    def tearDown(self):
+        """
+        This method cleans up.
+        :return:
+        """
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def test_hits(self):
+        """
+        This test checks if cached responses skip the network, also for other cache instances.
+        :return:
+        """
+        self.assertEqual(self.api.post(id=1)['id'], 1)
+        self.assertEqual(self.api.post(id=1)['id'], 1)
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(len(self.api.posts(userId=1)), 100)
+        self.assertEqual(self.server.requests, 2)
+        other = SQLiteCache(self.path)
+        response, fresh = other.get(self.api.prepare('post').call.cache_key(self.api, 'posts/1/', {}))
+        self.assertTrue(fresh)
+        self.assertEqual(response.headers['Content-Type'], 'application/json; charset=utf-8')
+        self.assertRaises(APIError, self.api.post, id=1000)
+        self.assertRaises(APIError, self.api.post, id=1000)
+        self.assertEqual(self.server.requests, 4)
+        self.assertRaises(ValueError, APIMethod, 'post', 'posts/', cache=self.cache)
+
+    def test_tenants(self):
+        """
+        This test checks if responses are cached per credentials and headers unless the cache is shared.
+        :return:
+        """
+        tenants = [self.TestAPI(self.server.url, (tenant, 'secret'), load_json=True) for tenant in ('a', 'b')]
+        for api in tenants + tenants:
+            self.assertEqual(api.post(id=1)['id'], 1)
+        self.assertEqual(self.server.requests, 2)
+        self.TestAPI(self.server.url, ('a', 'secret'), load_json=True, headers={'X-Tenant': 'a'}).post(id=1)
+        self.assertEqual(self.server.requests, 3)
+        tenants[0].post(id=1, headers={'X-Tenant': 'a'})
+        self.assertEqual(self.server.requests, 3)
+        self.cache.shared = True
+        for api in tenants + [self.api]:
+            self.assertEqual(api.post(id=2)['id'], 2)
+        self.assertEqual(self.server.requests, 4)
+
+    def test_stale(self):
+        """
+        This test checks if only a lock holder refreshes stale entries.
+        :return:
+        """
+        self.cache.ttl = 0
+        self.api.post(id=1)
+        other = SQLiteCache(self.path)
+        key = self.api.prepare('post').call.cache_key(self.api, 'posts/1/', {})
+        self.assertTrue(other.acquire(key))
+        self.assertEqual(self.api.post(id=1)['id'], 1)
+        self.assertEqual(self.server.requests, 1)
+        other.release(key)
+        self.api.post(id=1)
+        self.assertEqual(self.server.requests, 2)
+        other.clear()
+        self.assertIsNone(other.get(key))
+
+    def test_eviction(self):
+        """
+        This test checks if oldest entries are evicted when the cache is full.
+        :return:
+        """
+        self.cache.max_size = 200
+        for post_id in range(1, 5):
+            self.api.post(id=post_id)
+        self.assertIsNone(self.cache.get(self.api.prepare('post').call.cache_key(self.api, 'posts/1/', {})))
+        self.assertIsNotNone(self.cache.get(self.api.prepare('post').call.cache_key(self.api, 'posts/4/', {})))
@@ -0,0 +1,75 @@
+"""
+This module contains tests for the load generator.
+"""
+import threading
+import unittest
+
+from .. import GenericAPI, APIMethod
+from .. import loadtest
+from ..testing import StandInServer
+
+
+class LoadTestTest(unittest.TestCase):
+    """
+    This suite tests the load generator.
+    """
+    def test_closed_loop(self):
+        """
+        This test checks a closed loop test of a fixed number of calls, including errors.
+        :return:
+        """
+        class TestAPI(GenericAPI):
+            """
+            API with a failing method.
+            """
+            post = APIMethod('get', 'posts/{id}/')
+            missing = APIMethod('get', 'posts/{id}/')
+
+        mix = [('post', 3, lambda rand: {'id': rand.randint(1, 100)}), ('missing', 1, {'id': 1000})]
+        with StandInServer() as server:
+            api = TestAPI(server.url, None, throw_on_error=True)
+            report = loadtest.LoadTest(api, mix, concurrency=4, requests=200, seed=1).run()
+            self.assertEqual(server.requests, 200)
+        data = report.to_dict()
+        self.assertEqual(data['total']['count'], 200)
+        self.assertEqual(data['methods']['post']['errors'], {})
+        self.assertEqual(data['methods']['missing']['errors'], {'APIError': data['methods']['missing']['count']})
+        self.assertEqual(data['methods']['missing']['error_rate'], 1.0)
+        self.assertTrue(0 < data['total']['p50'] <= data['total']['p99'] <= data['total']['max'])
+        self.assertIn('missing', report.format())
+
+    def test_open_loop(self):
+        """
+        This test checks pacing of an open loop test and latency measured from scheduled start.
+        :return:
+        """
+        class SlowAPI(object):  # pylint: disable=too-few-public-methods
+            """
+            Stand-in for an API whose calls take 50ms.
+            """
+            @staticmethod
+            def wait():
+                """
+                Take 50ms.
+                """
+                threading.Event().wait(0.05)
+
+        report = loadtest.LoadTest(SlowAPI(), [('wait', 1)], concurrency=1, rate=100, duration=0.5).run()
+        stats = report.to_dict()['total']
+        self.assertEqual(stats['count'], 50)
+        # A single caller falls behind the schedule, so later calls include the time they waited.
+        self.assertGreater(stats['max'], 1.0)
+        self.assertEqual(loadtest.percentile([1, 2, 3, 4], 50), 2)
+        self.assertIsNone(loadtest.percentile([], 99))
+
+    def test_main(self):
+        """
+        This test checks the command line against the stand-in server.
+        :return:
+        """
+        data = loadtest.main(['devourer.benchmarks.AsyncBenchmarkAPI', 'devourer.benchmarks:MIX', '--stand-in',
+                              '--requests', '50', '--init', '{"load_json": true}', '--json'])
+        self.assertEqual(data['total']['count'], 50)
+        self.assertEqual(data['total']['errors'], {})
+        self.assertRaises(SystemExit, loadtest.parse_args, ['api', 'mix', '--mode', 'open'])
+        self.assertRaises(ValueError, loadtest.load_object, 'api')
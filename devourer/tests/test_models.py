@@ -0,0 +1,81 @@
+"""
+This module contains tests for response models.
+"""
+import pickle
+import unittest
+
+from .. import GenericAPI, APIMethod
+from ..models import Field, Model, decode
+from ..testing import StandInServer
+
+
+class ModelTest(unittest.TestCase):
+    """
+    This suite tests decoding responses into models.
+    """
+    class Comment(Model):
+        """
+        A comment record.
+        """
+        comment_id = Field(int, key='id')
+        email = Field(str)
+
+    class Post(Model):
+        """
+        A post record.
+        """
+        post_id = Field(int, key='id', coerce=True)
+        user_id = Field(int, key='userId')
+        title = Field(str, default='')
+
+    def test_decode(self):
+        """
+        This test checks decoding, coercion, defaults and nested models.
+        :return:
+        """
+        posts = decode(' [ {"id": "1", "userId": 2, "extra": true} , {"id": 2, "title": "t"} ] ', self.Post)
+        self.assertEqual(posts, [self.Post(post_id=1, user_id=2), self.Post(post_id=2, title='t')])
+        self.assertEqual(posts[0].to_dict(), {'id': 1, 'userId': 2, 'title': ''})
+        self.assertFalse(hasattr(posts[0], '__dict__'))
+        self.assertEqual(decode('[]', self.Post), [])
+        self.assertEqual(decode('{"id": 3}', self.Post).post_id, 3)
+        self.assertRaises(ValueError, decode, '[{"id": 1} {"id": 2}]', self.Post)
+        for content in ('null', '[1, 2]', '[{"id": 1}, null]', '[{"id": 1}] trailing', '[] []', '[{"id": 1}'):
+            self.assertRaises(ValueError, decode, content, self.Post)
+        self.assertEqual(len(decode('[{"id": 1}] \n', self.Post)), 1)
+        self.assertEqual(repr(posts[1]), "Post(post_id=2, user_id=None, title='t')")
+        self.assertEqual(pickle.loads(pickle.dumps(posts[0])), posts[0])
+        self.assertNotEqual(posts[0], posts[1])
+
+        class Thread(Model):
+            """
+            A post with comments.
+            """
+            post = Field(self.Post)
+            comments = Field([self.Comment], default=())
+
+        thread = Thread.from_dict({'post': {'id': 1}, 'comments': [{'id': 5, 'email': 'a@b.c'}]})
+        self.assertEqual(thread.post, self.Post(post_id=1))
+        self.assertEqual(thread.comments, [self.Comment(comment_id=5, email='a@b.c')])
+        self.assertEqual(Thread.from_dict({}).comments, ())
+
+    def test_api(self):
+        """
+        This test checks if declared methods decode responses into their models.
+        :return:
+        """
+        class TestAPI(GenericAPI):
+            """
+            API returning models.
+            """
+            posts = APIMethod('get', 'posts/', model=self.Post)
+            post = APIMethod('get', 'posts/{id}/', model=self.Post)
+            comments = APIMethod('get', 'posts/{id}/comments')
+
+        with StandInServer() as server:
+            api = TestAPI(server.url, None, load_json=True)
+            posts = api.posts()
+            self.assertEqual(len(posts), 100)
+            self.assertEqual((posts[10].post_id, posts[10].user_id, posts[10].title), (11, 2, 'post 11'))
+            self.assertEqual(api.post(id=3).title, 'post 3')
+            self.assertIsInstance(api.comments(id=1)[0], dict)
@@ -0,0 +1,170 @@
+"""
+This module contains tests for API classes generated from OpenAPI documents.
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from .. import AsyncAPI
+from .. import openapi
+from ..testing import StandInServer
+
+
+class OpenAPITest(unittest.TestCase):
+    """
+    This suite tests generating API classes from OpenAPI documents.
+    """
+    spec = {
+        'openapi': '3.0.0',
+        'info': {'title': 'stand-in posts'},
+        'paths': {
+            '/posts/': {
+                'get': {'operationId': 'listPosts', 'parameters': [{'name': 'userId', 'in': 'query'},
+                                                                   {'name': 'X-Request-Id', 'in': 'header'}]},
+                'post': {'operationId': 'createPost',
+                         'requestBody': {'$ref': '#/components/requestBodies/Post'}},
+            },
+            '/posts/{id}/': {
+                'parameters': [{'$ref': '#/components/parameters/id'}],
+                'get': {'operationId': 'getPost', 'parameters': [{'name': 'session', 'in': 'cookie'}]},
+            },
+            '/posts/{id}/comments': {
+                'parameters': [{'$ref': '#/components/parameters/id'}],
+                'get': {'operationId': 'import'},
+            },
+        },
+        'components': {
+            'parameters': {'id': {'name': 'id', 'in': 'path', 'required': True}},
+            'requestBodies': {'Post': {'content': {'application/json': {
+                'schema': {'$ref': '#/components/schemas/Post'}}}}},
+            'schemas': {'Post': {'type': 'object', 'required': ['title'],
+                                 'properties': {'title': {'$ref': '#/components/schemas/Title'}}},
+                        'Title': {'type': 'string'}},
+        },
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        This method writes the spec and starts a stand-in server it describes.
+        :return:
+        """
+        cls.directory = tempfile.mkdtemp()
+        cls.server = StandInServer().start()
+        cls.path = os.path.join(cls.directory, 'spec.json')
+        with open(cls.path, 'w') as spec_file:
+            json.dump(dict(cls.spec, servers=[{'url': cls.server.url.rstrip('/')}]), spec_file)
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        This method cleans up.
+        :return:
+        """
+        cls.server.stop()
+        shutil.rmtree(cls.directory)
+
+    def test_generate(self):
+        """
+        This test checks generated methods and calls them.
+        :return:
+        """
+        cache_dir = os.path.join(self.directory, 'cache')
+        api_class = openapi.generate_api(self.path, cache_dir=cache_dir)
+        self.assertEqual(api_class.__name__, 'StandInPosts')
+        self.assertFalse(dict.__contains__(api_class._methods, 'get_post'))  # pylint: disable=protected-access
+        api = api_class(load_json=True)
+        self.assertEqual(api.get_post(id=3)['id'], 3)
+        self.assertEqual(len(api.import_(id=3)), 5)
+        self.assertEqual(len(api.list_posts(userId=1)), 100)
+        self.assertEqual(api.create_post(payload={'title': 'new'})['id'], 101)
+        method = api.prepare('create_post').call
+        self.assertEqual((method.http_method, method.schema), ('post', 'posts/'))
+        self.assertEqual(method.body_schema['properties'], {'title': {'type': 'string'}})
+        self.assertEqual(api.prepare('list_posts').call.query_params, ['userId'])
+        self.assertEqual(len(api.list_posts(userId=1, **{'X-Request-Id': 'abc'})), 100)
+        self.assertEqual(self.server.last_headers['X-Request-Id'], 'abc')
+        self.assertEqual(api.get_post(id=2, session='secret')['id'], 2)
+        self.assertEqual(self.server.last_headers['Cookie'], 'session=secret')
+        requests = self.server.requests
+        self.assertRaises(TypeError, api.list_posts, user=1)
+        for payload in ({}, {'title': 1}, ['title']):
+            self.assertRaises(ValueError, api.create_post, payload=payload)
+        self.assertEqual(self.server.requests, requests)
+        self.assertRaises(AttributeError, lambda: api.nonexistent)
+
+        compile_spec = openapi.compile_spec
+        openapi.compile_spec = None
+        try:
+            async_class = openapi.generate_api(self.path, base=AsyncAPI, name='Posts', cache_dir=cache_dir)
+        finally:
+            openapi.compile_spec = compile_spec
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        async_api = async_class(self.server.url, None, load_json=True)
+        self.assertEqual(async_api.get_post(id=4).result()['id'], 4)
+
+    @unittest.skipIf(not hasattr(os, 'getuid'), 'file ownership is not available')
+    def test_untrusted_cache(self):
+        """
+        This test checks if cached specs others can modify are ignored and the cache is private.
+        :return:
+        """
+        cache_dir = os.path.join(self.directory, 'private', 'cache')
+        openapi.load_compiled(self.path, cache_dir=cache_dir)
+        self.assertEqual(os.stat(cache_dir).st_mode & 0o777, 0o700)
+        cache_path = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        self.assertEqual(os.stat(cache_path).st_mode & 0o077, 0)
+        with open(cache_path) as cache_file:
+            planted = json.load(cache_file)
+        planted['url'] = 'http://attacker.invalid/'
+        with open(cache_path, 'w') as cache_file:
+            json.dump(planted, cache_file)
+        self.assertEqual(openapi.load_compiled(self.path, cache_dir=cache_dir)['url'], planted['url'])
+        os.chmod(cache_path, 0o666)
+        self.assertEqual(openapi.load_compiled(self.path, cache_dir=cache_dir)['url'], self.server.url)
+        os.chmod(cache_dir, 0o777)
+        os.remove(cache_path)
+        self.assertEqual(openapi.load_compiled(self.path, cache_dir=cache_dir)['url'], self.server.url)
+        self.assertEqual(os.listdir(cache_dir), [])
+        self.assertTrue(openapi.DEFAULT_CACHE_DIR.startswith(os.path.expanduser('~')) or
+                        'XDG_CACHE_HOME' in os.environ)
+
+    def test_subclass(self):
+        """
+        This test checks if generated classes can be extended with hooks.
+        :return:
+        """
+        generated = openapi.generate_api(self.path, cache_dir=None)
+        self.assertEqual(len(generated._methods), 4)  # pylint: disable=protected-access
+        self.assertEqual(sorted(generated._methods.keys()),  # pylint: disable=protected-access
+                         ['create_post', 'get_post', 'import_', 'list_posts'])
+        # Using the parent first must not hide hooks of subclasses.
+        parent = generated(load_json=True)
+        self.assertEqual(len(parent.list_posts()), 100)
+        self.assertEqual(parent.get_post(id=5)['id'], 5)
+
+        class PostsAPI(generated):
+            """
+            Generated API with custom hooks.
+            """
+            def finalize_get_post(self, name, result, *args, **kwargs):
+                """
+                Return post's title only.
+                """
+                return self.finalize(name, result, *args, **kwargs)['title']
+
+            def call_list_posts(self, *args, **kwargs):
+                """
+                Return number of posts.
+                """
+                return len(self.call('list_posts', *args, **kwargs))
+
+        api = PostsAPI(load_json=True)
+        self.assertEqual(api.get_post(id=5), 'post 5')
+        self.assertEqual(api.list_posts(), 100)
+        self.assertEqual(len(parent.list_posts()), 100)
+        self.assertEqual(parent.get_post(id=5)['id'], 5)
+        self.assertEqual(len(PostsAPI._methods), 4)  # pylint: disable=protected-access
+        self.assertEqual(openapi.method_name('3dPrint'), '_3d_print')
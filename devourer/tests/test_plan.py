@@ -0,0 +1,105 @@
+"""
+This module contains tests for plans of dependent calls.
+"""
+import unittest
+
+from .. import GenericAPI, AsyncAPI, APIMethod, APIError
+from ..plan import Plan
+from ..testing import StandInServer
+
+
+class PlanTest(unittest.TestCase):
+    """
+    This suite tests running graphs of dependent calls.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        This method creates API classes used by plans.
+        :return:
+        """
+        class TestAPI(GenericAPI):
+            """
+            Sync API for plans.
+            """
+            posts = APIMethod('get', 'posts/')
+            post = APIMethod('get', 'posts/{id}/')
+            comments = APIMethod('get', 'posts/{id}/comments')
+
+        class AsyncTestAPI(AsyncAPI):
+            """
+            Async API for plans.
+            """
+            posts = APIMethod('get', 'posts/')
+            post = APIMethod('get', 'posts/{id}/')
+            comments = APIMethod('get', 'posts/{id}/comments')
+
+        cls.TestAPI = TestAPI
+        cls.AsyncTestAPI = AsyncTestAPI
+
+    def test_chain(self):
+        """
+        This test checks a posts -> post -> comments chain and deduplication.
+        :return:
+        """
+        for api_class in (self.TestAPI, self.AsyncTestAPI):
+            with StandInServer() as server:
+                api = api_class(server.url, None, load_json=True, throw_on_error=True)
+                plan = Plan(api, max_concurrency=4)
+                posts = plan.call('posts')
+                details = plan.each(posts, 'post', id=lambda post: post['id'])
+                comments = plan.each(details, 'comments', id=lambda post: post['id'])
+                first = plan.call('post', id=posts.map(lambda result: result[0]['id']))
+                first_comments = plan.call('comments', id=first.map(lambda post: post['id']))
+                results = list(plan.run())
+                self.assertEqual(len([result for node, result in results if node is comments]), 100)
+                self.assertEqual([result for node, result in results if node is first_comments][0][0]['postId'], 1)
+                self.assertEqual(server.requests, 201)
+                self.assertEqual(len(list(plan.run(first))), 1)
+                self.assertEqual(server.requests, 203)
+
+    def test_errors(self):
+        """
+        This test checks if failed calls and invalid plans raise errors.
+        :return:
+        """
+        with StandInServer() as server:
+            api = self.TestAPI(server.url, None, load_json=True, throw_on_error=True)
+            plan = Plan(api)
+            missing = plan.call('post', id=1000)
+            plan.each(missing, 'comments', id=lambda post: post['id'])
+            self.assertRaises(APIError, list, plan.run())
+            self.assertRaises(TypeError, plan.call, 'post', id=plan.each(missing, 'post', id=1))
+            self.assertRaises(TypeError, plan.each, [], 'post')
+            self.assertRaises(TypeError, plan.each, missing, 'post', id=plan.each(missing, 'post', id=1))
+
+    def test_each_dependencies(self):
+        """
+        This test checks if Call nodes and Derived values among arguments of each() are resolved.
+        :return:
+        """
+        marks = []
+
+        class MarkingAPI(self.AsyncTestAPI):
+            """
+            API recording the mark argument of calls.
+            """
+            def prepare_post(self, name, *args, **kwargs):
+                """
+                Record and drop the mark.
+                """
+                marks.append(kwargs.pop('mark', None))
+                return self.prepare(name, *args, **kwargs)
+
+        with StandInServer() as server:
+            api = MarkingAPI(server.url, None, load_json=True, throw_on_error=True)
+            plan = Plan(api)
+            posts = plan.call('posts')
+            first = plan.call('post', id=1)
+            same = plan.each(posts, 'post', id=first.map(lambda post: post['id']))
+            marked = plan.each(posts, 'post', id=lambda post: post['id'], mark=first)
+            results = list(plan.run(same, marked))
+            self.assertEqual([result['id'] for node, result in results if node is same], [1] * 100)
+            self.assertEqual(len([result for node, result in results if node is marked]), 100)
+            self.assertEqual(server.requests, 102)
+        self.assertEqual(marks.count(server.posts[0]), 100)
@@ -0,0 +1,85 @@
+"""
+This module contains tests for streamed request and response bodies.
+"""
+import tempfile
+import unittest
+
+from .. import GenericAPI, APIMethod
+from ..streaming import MultipartStream, NDJSONStream
+from ..testing import StandInServer
+
+
+class StreamingTest(unittest.TestCase):
+    """
+    This suite tests streaming request bodies.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        This method starts a stand-in server and creates an API uploading to it.
+        :return:
+        """
+        class TestAPI(GenericAPI):
+            """
+            API with an upload method.
+            """
+            upload = APIMethod('post', 'upload/')
+
+        cls.server = StandInServer().start()
+        cls.api = TestAPI(cls.server.url, None, load_json=True, throw_on_error=True, headers={'X-Tenant': '1'})
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        This method stops the stand-in server.
+        :return:
+        """
+        cls.server.stop()
+
+    def test_ndjson(self):
+        """
+        This test checks if generator payloads are streamed as NDJSON.
+        :return:
+        """
+        result = self.api.upload(payload=({'id': i} for i in range(20000)))
+        self.assertEqual(result['lines'], 20000)
+        self.assertTrue(result['chunked'])
+        self.assertEqual(result['content_type'], 'application/x-ndjson')
+        chunks = list(NDJSONStream(({'id': i} for i in range(3)), chunk_size=16))
+        self.assertEqual(chunks, [b'{"id":0}\n{"id":1}\n', b'{"id":2}\n'])
+        self.assertEqual(self.api.upload(payload=[1, 2])['lines'], 0)
+        bare = type(self.api)(self.server.url, None, load_json=True)
+        self.assertEqual(bare.upload(payload=iter([{'id': 1}]))['content_type'], 'application/x-ndjson')
+
+    def test_multipart(self):
+        """
+        This test checks multipart encoding of fields and files.
+        :return:
+        """
+        with tempfile.TemporaryFile() as upload:
+            upload.write(b'a,b\n' * 1000)
+            upload.seek(0)
+            fields = [('kind', u'posts'), ('file', ('posts.csv', upload, 'text/csv')),
+                      ('parts', ('parts.txt', [b'one', u'two']))]
+            stream = MultipartStream(fields, boundary='xyz', chunk_size=100)
+            result = self.api.upload(data=stream)
+            upload.seek(0)
+            body = b''.join(stream)
+        self.assertEqual(result['bytes'], len(body))
+        self.assertTrue(result['chunked'])
+        self.assertEqual(result['content_type'], 'multipart/form-data; boundary=xyz')
+        self.assertTrue(body.startswith(b'--xyz\r\nContent-Disposition: form-data; name="kind"\r\n\r\nposts\r\n'))
+        self.assertIn(b'filename="posts.csv"\r\nContent-Type: text/csv\r\n\r\na,b\n', body)
+        self.assertTrue(body.endswith(b'onetwo\r\n--xyz--\r\n'))
+
+    def test_file(self):
+        """
+        This test checks if file objects and chunk generators are sent as they are.
+        :return:
+        """
+        with tempfile.TemporaryFile() as upload:
+            upload.write(b'x\n' * 5000)
+            upload.seek(0)
+            self.assertEqual(self.api.upload(data=upload)['lines'], 5000)
+        result = self.api.upload(data=(b'y\n' for _ in range(10)))
+        self.assertEqual((result['lines'], result['chunked']), (10, True))
@@ -0,0 +1,99 @@
+"""
+This module contains tests for incremental synchronization.
+"""
+import threading
+import unittest
+
+from .. import GenericAPI, APIMethod, APIError
+from ..models import Field, Model
+from ..sync import DeltaSync
+from ..testing import StandInServer
+
+
+class DeltaSyncTest(unittest.TestCase):
+    """
+    This suite tests incremental synchronization of collections.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        This method creates the API class.
+        :return:
+        """
+        class PostModel(Model):
+            """
+            Post record.
+            """
+            post_id = Field(int, key='id')
+            title = Field(str)
+
+        class TestAPI(GenericAPI):
+            """
+            API for sync tests.
+            """
+            posts = APIMethod('get', 'posts/')
+            post_models = APIMethod('get', 'posts/', model=PostModel)
+
+        cls.TestAPI = TestAPI
+
+    def test_conditional(self):
+        """
+        This test checks change detection with conditional requests.
+        :return:
+        """
+        with StandInServer() as server:
+            original = server.posts
+            for name, load_json, key in (('posts', False, 'id'), ('post_models', True, 'post_id')):
+                server.posts = [dict(post) for post in original]
+                sync = DeltaSync(self.TestAPI(server.url, None, load_json=load_json), name, key=key)
+                delta = sync.poll()
+                self.assertEqual((len(delta.added), delta.changed, delta.removed), (100, [], []))
+                self.assertFalse(sync.poll())
+                self.assertEqual(server.last_headers['If-None-Match'], sync.etag)
+                server.posts[0]['title'] = 'changed'
+                del server.posts[1]
+                server.posts.append({'userId': 11, 'id': 101, 'title': 'new', 'body': 'new post'})
+                delta = sync.poll()
+                self.assertEqual([sync.item_key(item) for item in delta.added], [101])
+                self.assertEqual([sync.item_key(item) for item in delta.changed], [1])
+                self.assertEqual(delta.removed, [2])
+                sync.etag = None
+                self.assertFalse(sync.poll())
+                self.assertIn('If-Modified-Since', server.last_headers)
+                sync.reset()
+                self.assertEqual(len(sync.poll().added), 100)
+
+    def test_since(self):
+        """
+        This test checks syncing with a cursor parameter and tombstones.
+        :return:
+        """
+        with StandInServer() as server:
+            sync = DeltaSync(self.TestAPI(server.url, None, load_json=True), 'posts', since='since',
+                             key=lambda post: post.get('target', post['id']),
+                             cursor=lambda response, items: max([item['id'] for item in items] or [0]) or None,
+                             deleted=lambda post: post.get('deleted', False))
+            self.assertEqual(len(sync.poll().added), 100)
+            self.assertEqual(sync.position, 100)
+            self.assertFalse(sync.poll())
+            server.posts.append({'userId': 11, 'id': 101, 'title': 'new', 'body': 'new post'})
+            server.posts.append({'id': 102, 'deleted': True})
+            server.posts.append({'id': 104, 'target': 1, 'deleted': True})
+            server.posts.append({'userId': 1, 'id': 103, 'title': 'newer', 'body': 'newer post'})
+            delta = sync.poll()
+            self.assertEqual([post['id'] for post in delta.added], [101, 103])
+            self.assertEqual(delta.removed, [1])
+            self.assertEqual(sync.position, 104)
+        self.assertRaises(ValueError, DeltaSync, None, 'posts', since='since')
+
+    def test_errors(self):
+        """
+        This test checks if error responses raise APIError.
+        :return:
+        """
+        with StandInServer() as server:
+            sync = DeltaSync(self.TestAPI(server.url + 'missing/', None), 'posts')
+            self.assertRaises(APIError, sync.poll)
+            stop = threading.Event()
+            stop.set()
+            self.assertEqual(list(DeltaSync(self.TestAPI(server.url, None), 'posts').watch(1, stop)), [])
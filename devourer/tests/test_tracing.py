@@ -0,0 +1,91 @@
+"""
+This module contains tests for tracing of calls.
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from .. import GenericAPI, AsyncAPI, APIMethod, APIError, SharedSession
+from ..testing import StandInServer
+from ..tracing import InMemoryExporter, JSONLExporter, Tracer
+
+
+class TracingTest(unittest.TestCase):
+    """
+    This suite tests per-call tracing.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        This method starts a stand-in server.
+        :return:
+        """
+        class TestAPI(GenericAPI):
+            """
+            API to trace.
+            """
+            post = APIMethod('get', 'posts/{id}/')
+
+        class AsyncTestAPI(AsyncAPI):
+            """
+            Async API to trace.
+            """
+            post = APIMethod('get', 'posts/{id}/')
+
+        cls.TestAPI = TestAPI
+        cls.AsyncTestAPI = AsyncTestAPI
+        cls.server = StandInServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        This method stops the stand-in server.
+        :return:
+        """
+        cls.server.stop()
+
+    def test_phases(self):
+        """
+        This test checks if spans record phases and traceparent is sent.
+        :return:
+        """
+        exporter = InMemoryExporter()
+        tracer = Tracer(exporter)
+        api = self.TestAPI(self.server.url, None, load_json=True, throw_on_error=True, session=SharedSession(),
+                           tracer=tracer)
+        self.assertEqual(api.post(id=1)['id'], 1)
+        span = exporter.spans[-1]
+        self.assertEqual(span.name, 'post')
+        self.assertEqual(sorted(span.phases), ['connect', 'decode', 'download', 'finalize', 'prepare', 'ttfb'])
+        self.assertEqual(self.server.last_headers['traceparent'], span.traceparent)
+        self.assertIsNone(span.error)
+        api.post(id=2)
+        self.assertNotIn('connect', exporter.spans[-1].phases)
+
+        parent = '00-{}-{}-01'.format('a' * 32, 'b' * 16)
+        with tracer.context(parent):
+            self.assertRaises(APIError, api.post, id=1000)
+        span = exporter.spans[-1]
+        self.assertEqual((span.trace_id, span.parent_id), ('a' * 32, 'b' * 16))
+        self.assertIn('APIError', span.error)
+
+    def test_async(self):
+        """
+        This test checks if async spans record queue wait and are exported to JSONL.
+        :return:
+        """
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'spans.jsonl')
+        try:
+            api = self.AsyncTestAPI(self.server.url, None, load_json=True, tracer=Tracer(JSONLExporter(path)))
+            self.assertEqual([api.post(id=i).result()['id'] for i in (1, 2)], [1, 2])
+            with open(path) as spans_file:
+                spans = [json.loads(line) for line in spans_file]
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(len(spans), 2)
+        self.assertIn('queue_wait', spans[0]['phases'])
+        self.assertIn('ttfb', spans[1]['phases'])
+        self.assertNotEqual(spans[0]['trace_id'], spans[1]['trace_id'])
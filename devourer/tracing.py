@@ -0,0 +1,248 @@
+"""
+.. module:: tracing
+    :platform: Unix, Windows
+    :synopsis: This module contains optional per-call tracing - spans with timings of each phase of an API call,
+     W3C traceparent propagation and span exporters.
+
+"""
+import binascii
+import collections
+import json
+import os
+import threading
+import time
+import timeit
+from contextlib import contextmanager
+
+
+__all__ = ['Tracer', 'Span', 'InMemoryExporter', 'JSONLExporter', 'current_span']
+
+# Default number of spans kept by InMemoryExporter.
+DEFAULT_MAX_SPANS = 10000
+
+_LOCAL = threading.local()
+
+
+def current_span():
+    """
+    Return the span of the call running in current thread.
+
+    :returns: Span instance or None.
+    """
+    return getattr(_LOCAL, 'span', None)
+
+
+def _random_id(size):
+    """
+    Generate a random hex identifier.
+
+    :param size: size in bytes.
+    :returns: hex string.
+    """
+    return binascii.hexlify(os.urandom(size)).decode('ascii')
+
+
+class Span(object):  # pylint: disable=too-many-instance-attributes
+    """
+    A single traced API call with durations (seconds) of its phases: prepare (prepare hook), queue_wait (async
+    calls only), connect (new connections only, with SharedSession), ttfb (sending request and waiting for
+    response headers), download (reading the body), decode (JSON parsing) and finalize (finalize hook,
+    including decode).
+    """
+    __slots__ = ['name', 'trace_id', 'span_id', 'parent_id', 'start', 'duration', 'phases', 'error', '_started']
+
+    def __init__(self, name, parent=None):
+        """
+        Start the span.
+
+        :param name: name of the called method.
+        :param parent: W3C traceparent of the parent span, a new trace is started without it.
+        :returns: None
+        """
+        self.name = name
+        parts = parent.split('-') if parent else None
+        if parts and len(parts) == 4:
+            self.trace_id, self.parent_id = parts[1], parts[2]
+        else:
+            self.trace_id, self.parent_id = _random_id(16), None
+        self.span_id = _random_id(8)
+        self.start = time.time()
+        self.duration = None
+        self.phases = {}
+        self.error = None
+        self._started = timeit.default_timer()
+
+    @property
+    def traceparent(self):
+        """
+        W3C traceparent header value identifying this span.
+
+        :returns: traceparent header value.
+        """
+        return '00-{}-{}-01'.format(self.trace_id, self.span_id)
+
+    def add(self, phase, seconds):
+        """
+        Add time spent in a phase.
+
+        :param phase: name of the phase.
+        :param seconds: time spent.
+        :returns: None
+        """
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, phase):
+        """
+        Measure time spent in the with block as a phase.
+
+        :param phase: name of the phase.
+        """
+        started = timeit.default_timer()
+        try:
+            yield self
+        finally:
+            self.add(phase, timeit.default_timer() - started)
+
+    def finish(self, error=None):
+        """
+        Stop the span.
+
+        :param error: exception which ended the call.
+        :returns: None
+        """
+        self.duration = timeit.default_timer() - self._started
+        if error is not None:
+            self.error = repr(error)
+
+    def to_dict(self):
+        """
+        :returns: JSON-serializable representation of the span.
+        """
+        return {'name': self.name, 'trace_id': self.trace_id, 'span_id': self.span_id, 'parent_id': self.parent_id,
+                'start': self.start, 'duration': self.duration, 'phases': self.phases, 'error': self.error}
+
+
+class InMemoryExporter(object):  # pylint: disable=too-few-public-methods
+    """
+    Exporter keeping recently finished spans in memory.
+    """
+    def __init__(self, max_spans=DEFAULT_MAX_SPANS):
+        """
+        :param max_spans: number of spans kept, oldest ones are dropped.
+        :returns: None
+        """
+        self.spans = collections.deque(maxlen=max_spans)
+
+    def export(self, span):
+        """
+        Store a finished span.
+
+        :param span: Span instance.
+        :returns: None
+        """
+        self.spans.append(span)
+
+
+class JSONLExporter(object):  # pylint: disable=too-few-public-methods
+    """
+    Exporter appending finished spans to a file, one JSON object per line.
+    """
+    def __init__(self, path):
+        """
+        :param path: path of the file.
+        :returns: None
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        """
+        Append a finished span to the file.
+
+        :param span: Span instance.
+        :returns: None
+        """
+        line = json.dumps(span.to_dict()) + '\n'
+        with self._lock:
+            with open(self.path, 'a') as spans_file:
+                spans_file.write(line)
+
+
+class Tracer(object):
+    """
+    Tracer creates a span for every call of API instances it's given to and passes finished spans
+    to the exporter. Outgoing requests carry span's traceparent header.
+
+    Example:
+
+    >>> exporter = InMemoryExporter()
+    >>> api = MyAPI(url, None, tracer=Tracer(exporter))
+    >>> api.posts()
+    >>> exporter.spans[-1].phases
+    """
+    def __init__(self, exporter=None):
+        """
+        :param exporter: object with export(span) method, InMemoryExporter by default.
+        :returns: None
+        """
+        self.exporter = exporter if exporter is not None else InMemoryExporter()
+
+    @staticmethod
+    @contextmanager
+    def context(traceparent):
+        """
+        Make spans started in the with block children of a remote span, ie. of an incoming request.
+
+        :param traceparent: W3C traceparent header value.
+        """
+        previous = getattr(_LOCAL, 'parent', None)
+        _LOCAL.parent = traceparent
+        try:
+            yield
+        finally:
+            _LOCAL.parent = previous
+
+    @staticmethod
+    def start_span(name):
+        """
+        Start a span, child of the call running in current thread or of current context.
+
+        :param name: name of the called method.
+        :returns: Span instance.
+        """
+        parent = current_span()
+        return Span(name, parent.traceparent if parent is not None else getattr(_LOCAL, 'parent', None))
+
+    def run(self, span, function, *args, **kwargs):
+        """
+        Run a call as current span of this thread, then finish and export the span.
+
+        :param span: Span instance.
+        :param function: callable to run.
+        :param args: its arguments.
+        :param kwargs: its keyword arguments.
+        :returns: function's result.
+        """
+        previous = current_span()
+        _LOCAL.span = span
+        try:
+            result = function(*args, **kwargs)
+        except Exception as error:
+            self.finish(span, error)
+            raise
+        finally:
+            _LOCAL.span = previous
+        self.finish(span)
+        return result
+
+    def finish(self, span, error=None):
+        """
+        Finish a span and pass it to the exporter.
+
+        :param span: Span instance.
+        :param error: exception which ended the call.
+        :returns: None
+        """
+        span.finish(error)
+        self.exporter.export(span)
@@ -2,7 +2,7 @@ from distutils.core import setup
 
 setup(
     name='devourer',
-    packages=['devourer'],
+    packages=['devourer', 'devourer.tests'],
     version='0.5.0',
     install_requires=[
         'requests',